@@ -0,0 +1,52 @@
+"""Benchmark reading Member attributes off enum members, e.g. `MyEnum.ONE.title`.
+
+Compares attributes materialized on the enum members against the previous per-access `property` that read them off
+the `Member` value, and against a plain object attribute.
+
+Usage: python benchmarks/bench_attributes.py [number]
+"""
+from __future__ import print_function, unicode_literals
+
+import sys
+import timeit
+from enum import Enum
+
+from matrix_enum import MatrixEnum, Member
+
+
+class Numbers(MatrixEnum):
+    ONE = Member(digit=1, title='one', roman='I').extra(even=False)
+    TWO = Member(digit=2, title='two', roman='II').extra(even=True)
+
+
+class PropertyNumbers(Enum):
+    """How MatrixEnum exposed Member attributes before they were materialized on the members."""
+    ONE = Member(digit=1, title='one', roman='I').extra(even=False)
+    TWO = Member(digit=2, title='two', roman='II').extra(even=True)
+
+    title = property(lambda self: getattr(self.value, 'title'))
+    even = property(lambda self: getattr(self.value, 'even'))
+
+
+class Plain(object):
+    def __init__(self):
+        self.title = 'one'
+        self.even = False
+
+
+def report(label, stmt, number):
+    best = min(timeit.repeat(stmt, number=number, repeat=5))
+    print('{:<32} {:>8.1f} ns/op'.format(label, best / number * 1e9))
+
+
+def main(number=1000000):
+    member, previous, plain = Numbers.ONE, PropertyNumbers.ONE, Plain()
+    for key in ('title', 'even'):
+        print('attribute {!r}'.format(key))
+        report('  materialized attribute', lambda: getattr(member, key), number)
+        report('  previous property', lambda: getattr(previous, key), number)
+        report('  plain object attribute', lambda: getattr(plain, key), number)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,43 @@
+"""Benchmark serializing MatrixEnum members to JSON as one attribute, and decoding them again.
+
+Compares a `codec()` against per-item attribute reads and `MyEnum(value)` calls.
+
+Usage: python benchmarks/bench_codec.py [length]
+"""
+from __future__ import print_function, unicode_literals
+
+import json
+import random
+import sys
+import time
+
+from matrix_enum import MatrixEnum
+
+Regions = MatrixEnum.from_records(
+    'Regions', ({'NAME': 'R{}'.format(i), 'code': i, 'title': 'Region {}'.format(i)} for i in range(1000)),
+)
+
+
+def timed(label, function, *args):
+    start = time.time()
+    result = function(*args)
+    print('{:<30} {:>7.1f} ms'.format(label, (time.time() - start) * 1e3))
+    return result
+
+
+def main(length=100000):
+    members = [random.choice(Regions._by_ordinal) for _ in range(length)]
+    codec = Regions.codec('title')
+    print('{} members'.format(length))
+
+    titles = timed('encode: attribute reads', lambda: [member.title for member in members])
+    assert timed('encode: encode_many', codec.encode_many, members) == titles
+    timed('json: default=lambda', lambda: json.dumps(members, default=lambda member: member.title))
+    timed('json: default=codec.default', lambda: json.dumps(members, default=codec.default))
+
+    assert timed('decode: MyEnum(value)', lambda: [Regions(title) for title in titles]) == members
+    assert timed('decode: decode_many', codec.decode_many, titles) == members
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
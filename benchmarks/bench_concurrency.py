@@ -0,0 +1,57 @@
+"""Benchmark concurrent MatrixEnum reads from a thread pool: `MyEnum(value)`, `in` and attribute access.
+
+Reports the total throughput for increasing thread counts, counting a call, an `in` check and an attribute read
+as one lookup. Lookups read immutable indexes without locks, so
+throughput scales with threads on free-threaded CPython builds; with the GIL it stays roughly flat.
+
+Usage: python benchmarks/bench_concurrency.py [max_threads] [lookups_per_thread]
+"""
+from __future__ import division, print_function, unicode_literals
+
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from matrix_enum import MatrixEnum
+
+Regions = MatrixEnum.from_records(
+    'Regions', ({'NAME': 'R{}'.format(i), 'code': i, 'title': 'Region {}'.format(i)} for i in range(1000)),
+)
+
+
+def work(lookups, start):
+    start.wait()
+    codes = range(1000)
+    for _ in range(lookups // 1000):
+        for code in codes:
+            member = Regions(code)
+            assert member.title in Regions
+            assert member.code == code
+
+
+def measure(threads, lookups):
+    start = threading.Event()
+    with ThreadPoolExecutor(threads) as pool:
+        futures = [pool.submit(work, lookups, start) for _ in range(threads)]
+        began = time.time()
+        start.set()
+        for future in futures:
+            future.result()
+        return threads * lookups / (time.time() - began)
+
+
+def main(max_threads=8, lookups=200000):
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print('{} lookups per thread, GIL {}'.format(lookups, 'enabled' if gil else 'disabled'))
+    base = None
+    threads = 1
+    while threads <= max_threads:
+        throughput = measure(threads, lookups)
+        base = base or throughput
+        print('{:>3} threads {:>12,.0f} lookups/s  {:>5.2f}x'.format(threads, throughput, throughput / base))
+        threads *= 2
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
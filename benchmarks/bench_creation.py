@@ -0,0 +1,51 @@
+"""Benchmark MatrixEnum class creation for generated enums.
+
+Times a class-body style definition (a prepared class namespace passed to the metaclass) against
+`MatrixEnum.from_records()` at several member counts.
+
+Usage: python benchmarks/bench_creation.py [count ...]
+"""
+from __future__ import print_function, unicode_literals
+
+import sys
+import time
+
+from matrix_enum import MatrixEnum, Member
+
+
+def records(count):
+    return [
+        {'NAME': 'M{}'.format(i), 'code': i, 'iso': 'X{:06d}'.format(i), 'title': 'Region {}'.format(i), 'zone': i % 7}
+        for i in range(count)
+    ]
+
+
+def class_body(rows):
+    metacls = type(MatrixEnum)
+    classdict = metacls.__prepare__('Regions', (MatrixEnum,))
+    for row in rows:
+        classdict[row['NAME']] = Member(code=row['code'], iso=row['iso'], title=row['title']).extra(zone=row['zone'])
+    return metacls('Regions', (MatrixEnum,), classdict)
+
+
+def from_records(rows):
+    return MatrixEnum.from_records('Regions', rows, extra=['zone'])
+
+
+def report(label, func, rows):
+    start = time.time()
+    func(rows)
+    elapsed = time.time() - start
+    print('  {:<14} {:>9.1f} ms ({:.1f} us/member)'.format(label, elapsed * 1e3, elapsed / len(rows) * 1e6))
+
+
+def main(*counts):
+    for count in counts or (100, 10000, 100000):
+        rows = records(count)
+        print('{} members'.format(count))
+        report('class body', class_body, rows)
+        report('from_records', from_records, rows)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,45 @@
+"""Measure the import-time cost of declaring many MatrixEnums, eagerly and with `lazy=True`.
+
+Simulates a module declaring a few hundred enums of which a process only touches a handful.
+
+Usage: python benchmarks/bench_lazy.py [enums] [members]
+"""
+from __future__ import print_function, unicode_literals
+
+import gc
+import sys
+import time
+
+from matrix_enum import MatrixEnum, Member
+
+
+def declare(index, members, lazy):
+    metacls = type(MatrixEnum)
+    name = 'Enum{}'.format(index)
+    classdict = metacls.__prepare__(name, (MatrixEnum,))
+    for i in range(members):
+        classdict['M{}'.format(i)] = Member(code=i, title='{} {}'.format(name, i), short='{}-{}'.format(index, i))
+    return metacls(name, (MatrixEnum,), classdict, lazy=lazy)
+
+
+def measure(enums, members, lazy):
+    gc.collect()
+    start = time.process_time()
+    declared = [declare(i, members, lazy) for i in range(enums)]
+    declared_at = time.process_time()
+    for enum_class in declared[:5]:
+        enum_class(0)
+    return declared_at - start, time.process_time() - declared_at
+
+
+def main(enums=300, members=30, rounds=5):
+    print('{} enums of {} members, best of {}'.format(enums, members, rounds))
+    for label, lazy in (('eager', False), ('lazy', True)):
+        declare_time, use_time = min(measure(enums, members, lazy) for _ in range(rounds))
+        print('{:<6} declare {:>7.1f} ms, then first lookups in 5 enums {:>5.1f} ms'.format(
+            label, declare_time * 1e3, use_time * 1e3,
+        ))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,52 @@
+"""Benchmark `MatrixEnum(value)` lookups.
+
+Compares the class-level value index against the previous lookup path (reverse mapping to a `Member`, then a
+second lookup inside `EnumMeta.__call__`) and against a plain dict.
+
+Usage: python benchmarks/bench_lookup.py [number]
+"""
+from __future__ import print_function, unicode_literals
+
+import sys
+import timeit
+from enum import EnumMeta
+
+from matrix_enum import MatrixEnum, Member
+
+
+class Numbers(MatrixEnum):
+    ONE = Member(digit=1, title='one', roman='I')
+    TWO = Member(digit=2, title='two', roman='II')
+    THREE = Member(digit=3, title='three', roman='III')
+    FOUR = Member(digit=4, title='four', roman='IV')
+    FIVE = Member(digit=5, title='five', roman='V')
+
+
+PLAIN = dict((item, member) for member in Numbers for item in (member.digit, member.title, member.roman))
+
+
+def previous_lookup(cls, value):
+    """The lookup path `_MatrixEnumMeta.__call__` used before the value index existed."""
+    for item in cls:
+        maybe_value = item._reversed().get(value, None)
+        if maybe_value is not None:
+            value = maybe_value
+        break
+    return EnumMeta.__call__(cls, value)
+
+
+def report(label, stmt, number):
+    best = min(timeit.repeat(stmt, number=number, repeat=5))
+    print('{:<28} {:>8.1f} ns/op'.format(label, best / number * 1e9))
+
+
+def main(number=200000):
+    for value in (3, 'three', 'III'):
+        print('lookup {!r}'.format(value))
+        report('  MatrixEnum(value)', lambda: Numbers(value), number)
+        report('  previous path', lambda: previous_lookup(Numbers, value), number)
+        report('  plain dict', lambda: PLAIN[value], number)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,47 @@
+"""Benchmark building, combining and testing sets of MatrixEnum members, as MemberSets and as frozensets.
+
+Usage: python benchmarks/bench_member_set.py [members] [sets]
+"""
+from __future__ import print_function, unicode_literals
+
+import random
+import sys
+import time
+
+from matrix_enum import MatrixEnum, MemberSet
+
+
+def timed(label, function, *args):
+    start = time.time()
+    result = function(*args)
+    print('{:<28} {:>8.1f} ms'.format(label, (time.time() - start) * 1e3))
+    return result
+
+
+def main(members=500, sets=2000):
+    Features = MatrixEnum.from_records(
+        'Features', ({'NAME': 'F{}'.format(i), 'code': i} for i in range(members)),
+    )
+    choices = [random.sample(Features._by_ordinal, members // 4) for _ in range(sets)]
+    probes = [random.choice(Features._by_ordinal) for _ in range(sets)]
+    print('{} sets of {} of {} members'.format(sets, members // 4, members))
+
+    frozensets = timed('build frozenset', lambda: [frozenset(choice) for choice in choices])
+    member_sets = timed('build MemberSet', lambda: [MemberSet(Features, choice) for choice in choices])
+
+    def combine(sets):
+        result = sets[0]
+        for other in sets[1:]:
+            result = (result | other) - (result & other)
+        return result
+
+    timed('union/intersect frozenset', combine, frozensets)
+    timed('union/intersect MemberSet', combine, member_sets)
+    timed('contains frozenset', lambda: [probe in s for s in frozensets for probe in probes[:50]])
+    timed('contains MemberSet', lambda: [probe in s for s in member_sets for probe in probes[:50]])
+    print('{:<28} {:>8} bytes'.format('frozenset size', sys.getsizeof(frozensets[0])))
+    print('{:<28} {:>8} bytes'.format('MemberSet size', sys.getsizeof(int(member_sets[0]))))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
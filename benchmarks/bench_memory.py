@@ -0,0 +1,68 @@
+"""Measure memory per Member for large generated enums.
+
+Compares the compact `Member` layout (shared key schema plus a tuple of values) against the previous layout, which
+kept each value in a kwargs dict and again as an instance attribute. Needs Python 3 for `tracemalloc`.
+
+Usage: python benchmarks/bench_memory.py [members]
+"""
+from __future__ import print_function, unicode_literals
+
+import sys
+import tracemalloc
+
+from matrix_enum import MatrixEnum, Member
+
+
+class DictMember(object):
+    """The previous Member layout."""
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+        self._addressable = kwargs
+        self._extra_homomorphic = dict()
+
+    def extra(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+        self._extra_homomorphic = kwargs
+        return self
+
+
+def rows(count):
+    # Build the values up front so only the Member containers are measured.
+    return [
+        ('M{}'.format(i), dict(code=i, iso='X{:05d}'.format(i), title='Region {}'.format(i)), dict(continent='EU'))
+        for i in range(count)
+    ]
+
+
+def measure(label, build, count):
+    data = rows(count)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    built = build(data)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    print('{:<34} {:>8.1f} bytes/member'.format(label, size / float(count)))
+    return built
+
+
+def as_enum(data):
+    metacls = type(MatrixEnum)
+    classdict = metacls.__prepare__('Regions', (MatrixEnum,))
+    for name, addressable, extras in data:
+        classdict[name] = Member(**addressable).extra(**extras)
+    return metacls('Regions', (MatrixEnum,), classdict)
+
+
+def main(count=10000):
+    print('{} members, 3 addressable keys, 1 extra key'.format(count))
+    measure('Member (compact)', lambda data: [Member(**a).extra(**e) for _, a, e in data], count)
+    measure('Member (previous layout)', lambda data: [DictMember(**a).extra(**e) for _, a, e in data], count)
+    measure('MatrixEnum of compact Members', as_enum, count)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,52 @@
+"""Benchmark round-tripping lists of MatrixEnum members, as when shipping them to process pool workers.
+
+Compares pickling members by name against stdlib Enum's pickling by value (which pickles the whole Member and looks
+it up again on load), and against `pack_members()`/`unpack_members()`.
+
+Usage: python benchmarks/bench_pickle.py [length]
+"""
+from __future__ import print_function, unicode_literals
+
+import pickle
+import random
+import sys
+import time
+from enum import Enum
+
+from matrix_enum import MatrixEnum
+
+Regions = MatrixEnum.from_records(
+    'Regions',
+    ({'NAME': 'R{}'.format(i), 'code': i, 'title': 'Region {}'.format(i), 'zone': i % 7} for i in range(1000)),
+    extra=['zone'],
+)
+
+
+def round_trip(label, dump, load, members):
+    start = time.time()
+    data = dump(members)
+    dumped = time.time()
+    assert load(data) == members
+    loaded = time.time()
+    print('{:<22} {:>8} bytes  dump {:>6.1f} ms  load {:>6.1f} ms'.format(
+        label, len(data), (dumped - start) * 1e3, (loaded - dumped) * 1e3,
+    ))
+
+
+def main(length=100000):
+    members = [random.choice(Regions._by_ordinal) for _ in range(length)]
+    print('{} members of a {}-member enum'.format(length, len(Regions)))
+    round_trip('pickle (by name)', pickle.dumps, pickle.loads, members)
+
+    by_name = MatrixEnum.__reduce_ex__
+    MatrixEnum.__reduce_ex__ = Enum.__reduce_ex__
+    try:
+        round_trip('pickle (by value)', pickle.dumps, pickle.loads, members)
+    finally:
+        MatrixEnum.__reduce_ex__ = by_name
+
+    round_trip('pack_members', Regions.pack_members, Regions.unpack_members, members)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
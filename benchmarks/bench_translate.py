@@ -0,0 +1,43 @@
+"""Benchmark `MatrixEnum.translate()` over a million-row NumPy array.
+
+Compares each translation strategy (dense integer lookup array, binary search over sorted strings, and the mapping
+fallback for lists) against the per-element `MyEnum(value).attr` loop it replaces.
+
+Usage: python benchmarks/bench_translate.py [rows]
+"""
+from __future__ import print_function, unicode_literals
+
+import sys
+import time
+
+import numpy as np
+
+from matrix_enum import MatrixEnum, Member
+
+metacls = type(MatrixEnum)
+classdict = metacls.__prepare__('Codes', (MatrixEnum,))
+for i in range(200):
+    classdict['CODE_{}'.format(i)] = Member(code=i, title='Code #{}'.format(i))
+Codes = metacls('Codes', (MatrixEnum,), classdict)
+
+
+def report(label, func, rows):
+    start = time.time()
+    func()
+    elapsed = time.time() - start
+    print('{:<36} {:>8.1f} ms ({:.0f} ns/row)'.format(label, elapsed * 1e3, elapsed / rows * 1e9))
+
+
+def main(rows=1000000):
+    codes = np.random.randint(0, 200, size=rows)
+    titles = Codes.translate(codes, 'code', 'title')
+    code_list = codes.tolist()
+
+    report('loop: Codes(code).title', lambda: [Codes(code).title for code in code_list], rows)
+    report('translate(list, code -> title)', lambda: Codes.translate(code_list, 'code', 'title'), rows)
+    report('translate(array, code -> title)', lambda: Codes.translate(codes, 'code', 'title'), rows)
+    report('translate(array, title -> code)', lambda: Codes.translate(titles, 'title', 'code'), rows)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
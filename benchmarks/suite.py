@@ -0,0 +1,146 @@
+"""Benchmark suite for MatrixEnum creation, lookup, membership, attribute access and iteration.
+
+Every case is timed for MatrixEnum and for the nearest stdlib `Enum` and plain dict equivalent. Results are written
+as JSON so runs can be compared between releases.
+
+Usage: python benchmarks/suite.py [--output results.json] [--compare baseline.json] [--filter case] [--min-time secs]
+"""
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+import datetime
+import json
+import platform
+import sys
+import timeit
+from enum import Enum
+
+from matrix_enum import MatrixEnum
+
+SIZES = (10, 1000)
+CREATION_SIZES = (10, 100, 1000, 10000)
+
+
+def matrix_enum(size):
+    return MatrixEnum.from_records(
+        'Matrix{}'.format(size),
+        ({'NAME': 'M{}'.format(i), 'code': i, 'title': 'title {}'.format(i)} for i in range(size)),
+    )
+
+
+def stdlib_enum(size):
+    return Enum('Stdlib{}'.format(size), [('M{}'.format(i), i) for i in range(size)])
+
+
+def plain_dict(size):
+    return dict((i, 'title {}'.format(i)) for i in range(size))
+
+
+def _stdlib_contains(enum_class, value):
+    try:
+        enum_class(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _miss(enum_class, value):
+    try:
+        enum_class(value)
+    except ValueError:
+        pass
+
+
+def cases():
+    """Yield (case, implementation, statement) triples; each statement is a zero-argument callable."""
+    for size in CREATION_SIZES:
+        case = 'create[{}]'.format(size)
+        yield case, 'MatrixEnum', lambda size=size: matrix_enum(size)
+        yield case, 'Enum', lambda size=size: stdlib_enum(size)
+        yield case, 'dict', lambda size=size: plain_dict(size)
+
+    for size in SIZES:
+        matrix, stdlib, mapping = matrix_enum(size), stdlib_enum(size), plain_dict(size)
+        hit, miss = size // 2, -1
+        name = 'M{}'.format(hit)
+        matrix_member, stdlib_member = matrix[name], stdlib[name]
+
+        def variants(case, matrix_stmt, stdlib_stmt, dict_stmt):
+            case = '{}[{}]'.format(case, size)
+            return [(case, 'MatrixEnum', matrix_stmt), (case, 'Enum', stdlib_stmt), (case, 'dict', dict_stmt)]
+
+        for case in (
+            variants('call_hit', lambda: matrix(hit), lambda: stdlib(hit), lambda: mapping[hit]),
+            variants('from_code', lambda: matrix.from_code(hit), lambda: stdlib(hit), lambda: mapping[hit]),
+            variants('call_miss', lambda: _miss(matrix, miss), lambda: _miss(stdlib, miss),
+                     lambda: mapping.get(miss)),
+            variants('in_hit', lambda: hit in matrix, lambda: _stdlib_contains(stdlib, hit), lambda: hit in mapping),
+            variants('in_miss', lambda: miss in matrix, lambda: _stdlib_contains(stdlib, miss),
+                     lambda: miss in mapping),
+            variants('getattr', lambda: matrix_member.title, lambda: stdlib_member.value, lambda: mapping[hit]),
+            variants('getitem', lambda: matrix[name], lambda: stdlib[name], lambda: mapping[hit]),
+            variants('iterate', lambda: list(matrix), lambda: list(stdlib), lambda: list(mapping.values())),
+        ):
+            for triple in case:
+                yield triple
+
+
+def time_statement(statement, min_time):
+    """Best time per call in seconds, calibrating the number of calls so each repeat takes at least `min_time`."""
+    timer = timeit.Timer(statement)
+    number = 1
+    while number < 10 ** 7 and timer.timeit(number) < min_time / 10:
+        number *= 10
+    number = max(1, int(number * min_time / max(timer.timeit(number), 1e-9)))
+    return min(timer.repeat(repeat=5, number=number)) / number
+
+
+def run(min_time, pattern=None):
+    results = []
+    for case, implementation, statement in cases():
+        if pattern and pattern not in case:
+            continue
+        seconds = time_statement(statement, min_time)
+        results.append({'case': case, 'implementation': implementation, 'seconds': seconds})
+        print('{:<18} {:<10} {:>12.1f} ns'.format(case, implementation, seconds * 1e9))
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'date': datetime.datetime.utcnow().isoformat(),
+        'results': results,
+    }
+
+
+def compare(report, baseline):
+    """Print the MatrixEnum timings of `report` relative to those of `baseline`."""
+    before = dict(
+        (result['case'], result['seconds']) for result in baseline['results']
+        if result['implementation'] == 'MatrixEnum'
+    )
+    print('\nMatrixEnum vs baseline ({} {}):'.format(baseline['implementation'], baseline['python']))
+    for result in report['results']:
+        if result['implementation'] == 'MatrixEnum' and result['case'] in before:
+            ratio = result['seconds'] / before[result['case']]
+            print('{:<18} {:>6.2f}x'.format(result['case'], ratio))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--filter', help='only run cases containing this string')
+    parser.add_argument('--min-time', type=float, default=0.05, help='minimum seconds per timing repeat')
+    args = parser.parse_args(argv)
+
+    report = run(args.min_time, args.filter)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,13 +1,77 @@
 from __future__ import unicode_literals
 
+import csv
+import io
+import json
+import os
+import sys
+import threading
+import time
+from array import array
+from contextlib import contextmanager
 from enum import Enum, EnumMeta
 
-from six import iteritems, with_metaclass
+from six import PY2, binary_type, integer_types, iteritems, raise_from, string_types, text_type, with_metaclass
 
-__all__ = ["MatrixEnum", "Member"]
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
 
-_default_extra = dict()
-_default_set = set()
+__all__ = ["MatrixEnum", "Member", "MemberSet"]
+
+_missing = object()
+_lazy_default = os.environ.get('MATRIX_ENUM_LAZY', '').lower() in ('1', 'true', 'yes')
+_finalize_lock = threading.RLock()
+_on_missing_choices = ('raise', 'default', 'none')
+_clock = getattr(time, 'perf_counter', time.time)
+# Integer values are indexed by position when the table would have at most about half its slots empty.
+_dense_slack = 16
+
+
+class _KeySchema(tuple):
+    """Sorted tuple of Member keys, interned so every Member with the same keys shares one instance."""
+
+
+_key_schemas = dict()
+_no_extras = _KeySchema()  # Deliberately not interned: marks Members whose extras haven't been set.
+
+
+def _key_schema(keys):
+    keys = _KeySchema(sorted(keys))
+    return _key_schemas.setdefault(keys, keys)
+
+
+def _is_int(value):
+    return isinstance(value, integer_types) and not isinstance(value, bool)
+
+
+def _dense_low(values):
+    """The lowest of `values` if they are integers dense enough to index a table by, else None."""
+    if values and all(_is_int(value) for value in values):
+        low = min(values)
+        if max(values) - low < 2 * len(values) + _dense_slack:
+            return low
+    return None
+
+
+def _code_index(members, keys):
+    """Index the members by their integer code for `from_code`.
+
+    The code is the `code` attribute if all its values are integers, otherwise the only such attribute, if any.
+
+    Returns: (key, (offset, table)); `table` maps `code - offset` to members, and is a tuple (with None for gaps) if
+    the codes are dense enough, otherwise a dict.
+    """
+    keys = [key for key in sorted(keys) if members and all(_is_int(getattr(member, key)) for member in members)]
+    key = 'code' if 'code' in keys else keys[0] if len(keys) == 1 else None
+    if key is None:
+        return None, (0, ())
+    codes = dict((getattr(member, key), member) for member in members)
+    offset = min(codes)
+    if _dense_low(list(codes)) is None:
+        return key, (offset, dict((code - offset, member) for code, member in iteritems(codes)))
+    return key, (offset, tuple(codes.get(code) for code in range(offset, max(codes) + 1)))
 
 
 class Member(object):
@@ -28,8 +92,14 @@ class Member(object):
     cannot be used to look up Members in an enum.
     """
 
-    def _dedupe_set(self, kwargs, unique=True):
-        """Ensure member construction kwargs are valid."""
+    # Values are stored once, in tuples ordered by a shared key schema, to keep large enums compact.
+    __slots__ = ('_keys', '_values', '_extra_keys', '_extra_values', '_hash')
+
+    def _validated(self, kwargs, taken=(), unique=True):
+        """Ensure member construction kwargs are valid.
+
+        Returns: the key schema of the kwargs and their values in schema order.
+        """
         values = set()
         for key, value in iteritems(kwargs):
             if key in ('value', 'name'):
@@ -38,24 +108,52 @@ class Member(object):
                 raise ValueError("Value '{}' duplicated within Member specification.".format(value))
             else:
                 values.add(value)
-                if hasattr(self, key):
+                if key in taken or key in _member_attributes:
                     raise ValueError("Member attribute '{}' is not allowed.".format(key))
-                else:
-                    setattr(self, key, value)
+        keys = _key_schema(kwargs)
+        return keys, tuple(kwargs[key] for key in keys)
 
     def __init__(self, **kwargs):
-        self._dedupe_set(kwargs)
-        self._addressable = kwargs
-        self._extra_homomorphic = _default_extra
+        self._keys, self._values = self._validated(kwargs)
+        self._extra_keys, self._extra_values = _no_extras, ()
+        self._hash = self._content_hash()
+
+    def _content_hash(self):
+        # Hash keys *and* values: members of one enum share their keys, so hashing keys alone collides for all of them.
+        return hash((self._keys, self._values, self._extra_keys, self._extra_values))
+
+    @property
+    def _addressable(self):
+        return dict(zip(self._keys, self._values))
+
+    @property
+    def _extra_homomorphic(self):
+        return dict(zip(self._extra_keys, self._extra_values))
+
+    def __getattr__(self, key):
+        # Only reached when regular lookup fails, i.e. for the kwargs; the slots themselves must not recurse here.
+        if key not in Member.__slots__:
+            for keys, values in ((self._keys, self._values), (self._extra_keys, self._extra_values)):
+                if key in keys:
+                    return values[keys.index(key)]
+        # Enum probes values for descriptor methods on every assignment, so keep misses cheap.
+        raise AttributeError(key)
+
+    def __reduce__(self):
+        extras = self._extra_homomorphic if self._extra_keys is not _no_extras else None
+        return _rebuild_member, (self._addressable, extras)
 
     def __hash__(self):
-        return hash(frozenset(self._addressable.keys()))
+        return self._hash
 
     def __eq__(self, other):
         return (
             type(other) is type(self)
-            and self._addressable == other._addressable
-            and self._extra_homomorphic == other._extra_homomorphic
+            and self._hash == other._hash
+            and self._keys == other._keys
+            and self._values == other._values
+            and self._extra_keys == other._extra_keys
+            and self._extra_values == other._extra_values
         )
 
     def extra(self, **kwargs):
@@ -69,99 +167,403 @@ class Member(object):
 
         Returns: the Member instance, for convenient constructor chaining.
         """
-        if self._extra_homomorphic is not _default_extra:
+        if self._extra_keys is not _no_extras:
             raise ValueError('Can\'t set extras twice.')
-        self._dedupe_set(kwargs, unique=False)
-        self._extra_homomorphic = kwargs
+        self._extra_keys, self._extra_values = self._validated(kwargs, taken=self._keys, unique=False)
+        self._hash = self._content_hash()
         return self
 
 
+_member_attributes = frozenset(dir(Member))
+
+
+def _rebuild_member(addressable, extras):
+    member = Member(**addressable)
+    return member if extras is None else member.extra(**extras)
+
+
+class _MemberIndex(object):
+    """Validates the Members of one MatrixEnum as they are added, and builds their reverse mapping.
+
+    All Members must have the same addressable and extra keys, and every addressable value and member name must
+    resolve to a single Member. For `scoped` enums, values only need to be unique per key: values that resolve to
+    more than one Member are left out of the reverse mapping and collected in `ambiguous` instead.
+
+    With a `normalize` function, string values and member names must also be unique (or, for scoped enums, are
+    ambiguous) once normalized.
+    """
+
+    def __init__(self, scoped=False, normalize=None):
+        self.keys = None
+        self.extra_keys = None
+        self.reversed = dict()
+        self.ambiguous = set()
+        self.scoped = scoped
+        self.normalize = normalize
+        self.normalized = dict()
+        self.normalized_ambiguous = set()
+        self._names = dict()
+        self._scopes = dict()
+
+    def add(self, name, member):
+        # Check that all Members have the same addressable (main ctor) keys, and the same keys for extra_homomorphic.
+        # Key schemas are interned, so these comparisons are usually identity checks.
+        if self.keys is None:
+            self.keys, self.extra_keys = member._keys, member._extra_keys
+        elif member._keys != self.keys:
+            raise ValueError(
+                'Member {} has different addressable keys from other Members: got {}, expected {}.'.format(
+                    name,
+                    list(member._keys),
+                    list(self.keys),
+                ),
+            )
+        elif member._extra_keys != self.extra_keys:
+            raise ValueError(
+                'Member {} has different extra keys; got {}; expected {}.'.format(
+                    name,
+                    list(member._extra_keys),
+                    list(self.extra_keys),
+                ),
+            )
+
+        # Check reverse mappings across the whole set of Members.
+        if self.scoped:
+            self._add_scoped(name, member)
+        else:
+            self._add_unique(name, member)
+        if self.normalize is not None:
+            self._add_normalized(name, member)
+
+    def _add_unique(self, name, member):
+        reversed_addressable = self.reversed
+        for item in member._values:
+            if item in reversed_addressable:
+                owner = self._names[reversed_addressable[item]]
+                error = 'another member\'s name' if item == owner else 'an attribute of Member {}'.format(owner)
+                raise ValueError('Attribute value "{}" of Member {} is ambiguous with {}.'.format(item, name, error))
+            reversed_addressable[item] = member
+        # Names may match the member's own attributes, but not another member's.
+        if reversed_addressable.get(name, member) is not member:
+            raise ValueError(
+                'Attribute value "{}" of Member {} is ambiguous with another member\'s name.'.format(
+                    name,
+                    self._names[reversed_addressable[name]],
+                ),
+            )
+        reversed_addressable[name] = member
+        self._names[member] = name
+
+    def _add_normalized(self, name, member):
+        # Checked after the raw values, so only values that collide once normalized get this error.
+        normalized = self.normalized
+        for item in member._values + (name,):
+            if not isinstance(item, string_types):
+                continue
+            key = self.normalize(item)
+            if key in self.normalized_ambiguous:
+                continue
+            owner, owner_item = normalized.get(key, (member, item))
+            if owner is member:
+                normalized[key] = (member, item)
+            elif self.scoped:
+                del normalized[key]
+                self.normalized_ambiguous.add(key)
+            else:
+                owner_name = self._names[owner]
+                error = 'another member\'s name' if owner_item == owner_name else 'an attribute of Member {}'.format(
+                    owner_name,
+                )
+                raise ValueError('Attribute value "{}" of Member {} is ambiguous with {} when normalized.'.format(
+                    item, name, error,
+                ))
+
+    def _add_scoped(self, name, member):
+        # Names have a scope of their own: no Member key can be called 'name'.
+        names = self._scopes.setdefault('name', dict())
+        if name in names:
+            raise ValueError('Attribute value "{}" of Member {} is ambiguous with another member\'s name.'.format(
+                name, name,
+            ))
+        names[name] = member
+        for key, item in zip(member._keys, member._values):
+            scope = self._scopes.setdefault(key, dict())
+            if item in scope:
+                raise ValueError('Attribute {} value "{}" of Member {} is ambiguous with Member {}.'.format(
+                    key, item, name, scope[item],
+                ))
+            scope[item] = name
+            self._reverse_scoped(item, member)
+        self._reverse_scoped(name, member)
+
+    def _reverse_scoped(self, item, member):
+        if item in self.ambiguous:
+            return
+        if self.reversed.get(item, member) is not member:
+            del self.reversed[item]
+            self.ambiguous.add(item)
+        else:
+            self.reversed[item] = member
+
+
 class _MatrixEnumMeta(EnumMeta):
     """Metaclass to enforce unique Member constraints of MatrixEnum."""
 
-    @staticmethod
-    def _pgetter(key):
-        return property(lambda self: getattr(self.value, key))
-
-    def __new__(metacls, cls, bases, classdict):
-        homomorphic_extras = _default_set
-        allowed_keys = _default_set
-        reversed_addressable = dict()
-        for key, value in sorted(iteritems(classdict)):  # Sorted for consistent behavior across 2/3
-            if isinstance(value, Member):
-                # Check that all Members have the same addressable (main ctor) keys.
-                if allowed_keys is _default_set:
-                    allowed_keys = set(value._addressable.keys())
-                elif set(value._addressable.keys()) != allowed_keys:
-                    raise ValueError(
-                        'Member {} has different addressable keys from other Members: got {}, expected {}.'.format(
-                            key,
-                            sorted(value._addressable.keys()),
-                            sorted(allowed_keys),
-                        ),
-                    )
-
-                # Check that all Members have the same data for extra_homomorphic.
-                if homomorphic_extras is _default_set:
-                    homomorphic_extras = set(value._extra_homomorphic.keys())
-                elif set(value._extra_homomorphic.keys()) != homomorphic_extras:
-                    raise ValueError(
-                        'Member {} has different extra keys; got {}; expected {}.'.format(
-                            key,
-                            sorted(value._extra_homomorphic.keys()),
-                            sorted(homomorphic_extras),
-                        ),
-                    )
-
-                # Check reverse mappings across the whole set of Members.
-                for item in value._addressable.values():
-                    if item in reversed_addressable:
-                        error = 'another member\'s name'
-                        if item not in classdict:
-                            error = 'an attribute of Member {}'.format(
-                                next(k for k, v in iteritems(classdict) if v is reversed_addressable[item])
-                            )
-                        raise ValueError(
-                            'Attribute value "{}" of Member {} is ambiguous with {}.'.format(item, key, error)
-                        )
-                    reversed_addressable[item] = value
-                reversed_addressable[key] = value
-
-            # Callables are 'special' in that they get bound rather than member'd by the enum.
-            elif key not in ('__module__', '__metaclass__', '__doc__', '__qualname__', '_order_', '_ignore_')\
-                    and not (callable(value) or isinstance(value, classmethod)):
-                raise ValueError('{} is not a Member'.format(value))
-
-        for internal_key in {'_reversed'} | allowed_keys:
-            if internal_key in classdict:
-                raise ValueError('Key {} is not allowed.'.format(internal_key))
-
-        classdict['_reversed'] = lambda _: reversed_addressable
+    # (timing, top_misses, callback) once `enable_stats` was called on the enum or a base class.
+    _stats_options = None
+
+    @classmethod
+    def __prepare__(metacls, cls, bases, **kwds):
+        kwds.pop('lazy', None)
+        kwds.pop('scoped', None)
+        kwds.pop('normalize', None)
+        return super(_MatrixEnumMeta, metacls).__prepare__(cls, bases, **kwds)
+
+    def __new__(metacls, cls, bases, classdict, **kwds):
+        index = kwds.pop('_index', None)
+        lazy = kwds.pop('lazy', _lazy_default)
+        scoped = kwds.pop('scoped', False)
+        normalize = kwds.pop('normalize', None)
+        members = []
+        if index is None:
+            items = iteritems(classdict)
+            # Python 3 class bodies keep definition order; sort on 2 for consistent behavior.
+            for key, value in sorted(items) if PY2 else items:
+                if isinstance(value, Member):
+                    members.append((key, value))
+
+                # Callables are 'special' in that they get bound rather than member'd by the enum.
+                elif key not in ('__module__', '__metaclass__', '__doc__', '__qualname__', '__classcell__', '_order_',
+                                 '_ignore_')\
+                        and not (callable(value) or isinstance(value, classmethod)):
+                    raise ValueError('{} is not a Member'.format(value))
+            if PY2 and '_order_' not in classdict:  # pragma: no cover
+                # enum34 would order members by the memory addresses of their Members, which differ between
+                # processes; keep the sorted order they are validated in, so ordinals are stable.
+                classdict['_order_'] = [key for key, value in members]
+
+            if not lazy:
+                index = _MemberIndex(scoped, normalize)
+                for key, value in members:
+                    index.add(key, value)
+
+        if '_reversed' in classdict:
+            raise ValueError('Key _reversed is not allowed.')
+        class_keys = frozenset(classdict)
+        classdict['_reversed'] = lambda self: type(self)._finalize()._reversed_addressable
+
+        if lazy and not issubclass(metacls, _LazyMatrixEnumMeta):
+            metacls = _LazyMatrixEnumMeta
+        enum_class = super(_MatrixEnumMeta, metacls).__new__(metacls, cls, bases, classdict, **kwds)
+        enum_class._pending = (members, index, class_keys, scoped, normalize)
+        if members:
+            # Keep attributes read-only even before a lazily-defined enum is finalized.
+            enum_class._attribute_keys = frozenset(members[0][1]._keys + members[0][1]._extra_keys)
+        if not lazy:
+            enum_class._finalize()
+        elif members:
+            # Stand-ins for the `by_<key>` accessors until finalizing replaces them.
+            for key in members[0][1]._keys:
+                if 'by_' + key not in class_keys:
+                    setattr(enum_class, 'by_' + key, staticmethod(_pending_lookup(enum_class, 'by_' + key)))
+        return enum_class
+
+    def __init__(cls, name, bases, classdict, **kwds):
+        # Class keywords are handled by `__new__`; `type.__init__` doesn't accept them on Python 2.
+        super(_MatrixEnumMeta, cls).__init__(name, bases, classdict)
+
+    def _finalize(cls):
+        """Validate the Members and build the lookup indexes, if that hasn't happened yet.
+
+        This runs as part of class creation unless the enum was defined with `lazy=True` (or `MATRIX_ENUM_LAZY` was
+        set), in which case it runs on first lookup, iteration or attribute access instead.
+
+        Returns: the enum class.
+        """
+        if cls._pending is None:
+            return cls
+        with _finalize_lock:
+            if cls._pending is not None:
+                cls._build_indexes(*cls._pending)
+                cls._pending = None
+        return cls
+
+    def _build_indexes(cls, members, index, class_keys, scoped, normalize):
+        if index is None:
+            index = _MemberIndex(scoped, normalize)
+            for key, value in members:
+                index.add(key, value)
+
+        allowed_keys = set(index.keys or ())
+        homomorphic_extras = set(index.extra_keys or ())
+        for key in allowed_keys:
+            if key in class_keys or 'by_' + key in class_keys:
+                raise ValueError('Key {} is not allowed.'.format(key))
+        # Member attributes are set on each enum member, so they may share names with the class API (e.g. `get`), but
+        # must not replace what Enum and MatrixEnum keep on members themselves (e.g. `_value_` or `_reversed`).
+        reserved = set(vars(next(iter(cls._member_map_.values())))) if cls._member_map_ else set()
         for key in allowed_keys | homomorphic_extras:
-            # Have to call a function so the key gets copied and isn't closure-mutable.
-            classdict[key] = metacls._pgetter(key)
+            if key in reserved or key.startswith('_') and any(hasattr(base, key) for base in cls.__bases__):
+                raise ValueError('Key {} is not allowed.'.format(key))
+
+        # Resolve the reverse mapping to enum members once, so lookups by raw value are a single dict hit.
+        lookup = dict()
+        indexes = dict((key, dict()) for key in allowed_keys)
+        indexes['name'] = dict()
+        for member in cls._member_map_.values():
+            # Copy Member attributes onto the enum member itself so reading them is a plain instance attribute hit;
+            # MatrixEnum.__setattr__ keeps them read-only.
+            value = member.value
+            vars(member).update(zip(value._keys, value._values))
+            vars(member).update(zip(value._extra_keys, value._extra_values))
+            for key, item in zip(value._keys, value._values):
+                lookup[item] = member
+                indexes[key][item] = member
+            lookup[member.name] = member
+            indexes['name'][member.name] = member
+            lookup[member.value] = member
+            lookup[member] = member
+        # Reuse the normalized forms computed while validating rather than calling `normalize` again.
+        normalized = dict((key, lookup[owner]) for key, (owner, item) in iteritems(index.normalized))
+        for item in index.ambiguous:
+            del lookup[item]
+        if cls._stats_options is not None:
+            lookup = cls._instrumented(lookup, normalize)
+        cls._reversed_addressable = index.reversed
+        cls._ambiguous = dict.fromkeys(index.ambiguous, True)
+        # A staticmethod, so Python 2 doesn't turn a plain function into an unbound method.
+        cls._normalize = normalize if normalize is None else staticmethod(normalize)
+        cls._normalized = normalized
+        cls._indexes = indexes
+        for key in allowed_keys:
+            setattr(cls, 'by_' + key, staticmethod(_scoped_lookup(cls, key, indexes[key])))
+        cls._addressable_keys = tuple(sorted(allowed_keys))
+        cls._extra_keys = tuple(sorted(homomorphic_extras))
+        cls._attribute_keys = frozenset(allowed_keys | homomorphic_extras)
+        cls._translations = dict()
+        cls._codecs = dict()
+        cls._by_ordinal = tuple(cls._member_map_[name] for name in cls._member_names_)
+        cls._ordinals = dict((member, ordinal) for ordinal, member in enumerate(cls._by_ordinal))
+        cls._code_key, cls._codes = _code_index(cls._by_ordinal, allowed_keys)
+        if cls._code_key is not None and 'from_code' not in class_keys:
+            setattr(cls, 'from_code', staticmethod(_code_lookup(cls, cls._code_key, *cls._codes)))
+        cls._inverted_indexes = dict((key, _inverted_index(cls._by_ordinal, key)) for key in homomorphic_extras)
+        # Every index is complete before the lookup index that `MatrixEnum(value)` reads without checking `_pending`
+        # is published, and none is modified afterwards, so concurrent readers need no locks. Translations and codecs
+        # are built in full before being cached.
+        cls._lookup = lookup
 
-        return super(_MatrixEnumMeta, metacls).__new__(metacls, cls, bases, classdict)
+    def _install_stats(cls):
+        """Swap the lookup index for an instrumented copy, or back to a plain dict if stats are disabled.
+
+        Instrumentation lives entirely in the index, so enums without stats don't pay for it on lookups.
+        """
+        if cls._pending is not None or not cls._member_map_:
+            return
+        lookup = dict(cls._lookup)
+        if cls._stats_options is not None:
+            lookup = cls._instrumented(lookup, cls._normalize)
+        cls._lookup = lookup
+
+    def _instrumented(cls, lookup, normalize):
+        # Normalized values are resolved inside the instrumented index, so a lookup is recorded once, with its outcome.
+        fallback = None if normalize is None else cls._get_normalized
+        return _InstrumentedLookup(lookup, _LookupStats(cls, *cls._stats_options), fallback)
 
     def __call__(cls, value, names=None, *args, **kwargs):
-        if names is None:
-            # Easiest way to get access to the class field without edge-casing classes with no enum elements is to
-            # iterate.
-            for item in cls:
-                maybe_value = item._reversed().get(value, None)
-                if maybe_value is not None:
-                    value = maybe_value
-                break
+        if names is not None:
+            # Functional API, e.g. `MatrixEnum('Name', [('ONE', Member(code=1))])`.
+            return super(_MatrixEnumMeta, cls).__call__(value, names, *args, **kwargs)
+        try:
+            return cls._lookup[value]
+        except (KeyError, TypeError):
+            pass
+        # Outside the except clause, so errors aren't chained to the KeyError.
+        return cls._call_missed(value, *args, **kwargs)
 
+    def _call_missed(cls, value, *args, **kwargs):
+        """`MatrixEnum(value)` for a value the lookup index missed, without probing the index again."""
+        # Misses and unhashable values go through Enum so errors (and `_missing_`) behave as usual.
+        if cls._pending is not None:
+            return cls._finalize()(value)
+        member = cls._get_normalized(value)
+        if member is not None:
+            return member
+        if _hashable_get(cls._ambiguous, value, False):
+            raise ValueError('{!r} is ambiguous in {}: look it up with by().'.format(value, cls.__name__))
         return super(_MatrixEnumMeta, cls).__call__(value, *args, **kwargs)
 
     def __contains__(cls, value):
-        # Enable `in` checks using the Member values by using the same logic as the constructor
+        # Enable `in` checks using the Member values by answering from the same index as the constructor
         try:
-            cls(value)
-            return True
-        except ValueError:
+            if value in cls._lookup:
+                return True
+        except TypeError:
+            # Unhashable values can't be in the index.
             return False
+        if cls._pending is not None:
+            return value in cls._finalize()
+        return cls._get_normalized(value) is not None
+
+    def _get_normalized(cls, value, default=None):
+        """Look up a string missing from the index by its normalized form, for enums declared with `normalize`."""
+        if cls._normalize is None or not isinstance(value, string_types):
+            return default
+        return cls._normalized.get(cls._normalize(value), default)
+
+    def _from_members(cls, name, members, module=None, qualname=None, scoped=False, normalize=None):
+        """Create a subclass of `cls` from (name, Member) pairs, validating each pair as it is read."""
+        if PY2 and isinstance(name, text_type):  # pragma: no cover
+            # Class names must be native strings, so convert them to ASCII like enum34's functional API does.
+            try:
+                name = name.encode('ascii')
+            except UnicodeEncodeError:
+                raise TypeError('{!r} is not representable in ASCII'.format(name))
+        metacls = type(cls)
+        bases = (cls,)
+        classdict = metacls.__prepare__(name, bases)
+        index = _MemberIndex(scoped, normalize)
+        order = []
+        for member_name, member in members:
+            index.add(member_name, member)
+            classdict[member_name] = member
+            order.append(member_name)
+        if PY2:  # pragma: no cover
+            # enum34 can't tell the order members were added in, so keep them in row order.
+            classdict['_order_'] = order
+        if module is not None:
+            classdict['__module__'] = module
+        if qualname is not None:
+            classdict['__qualname__'] = qualname
+        return metacls.__new__(metacls, name, bases, classdict, _index=index, scoped=scoped, normalize=normalize)
+
+
+class _LazyMatrixEnumMeta(_MatrixEnumMeta):
+    """Metaclass of lazily-defined MatrixEnums, which are finalized before Enum answers anything from their members.
+
+    Otherwise Members that Enum made aliases of each other (e.g. two with the same values) would go unreported.
+    Eager enums don't use it, so they don't pay for the checks.
+    """
+
+    def __iter__(cls):
+        return super(_LazyMatrixEnumMeta, cls._finalize_defined()).__iter__()
+
+    def __reversed__(cls):
+        return super(_LazyMatrixEnumMeta, cls._finalize_defined()).__reversed__()
+
+    def __len__(cls):
+        return super(_LazyMatrixEnumMeta, cls._finalize_defined()).__len__()
+
+    def __getitem__(cls, name):
+        return super(_LazyMatrixEnumMeta, cls._finalize_defined()).__getitem__(name)
+
+    @property
+    def __members__(cls):
+        return super(_LazyMatrixEnumMeta, cls._finalize_defined()).__members__
+
+    def _finalize_defined(cls):
+        # Enum may use these while the class is being created, before it has a `_pending` of its own.
+        return cls if cls.__dict__.get('_pending') is None else cls._finalize()
 
 
 class MatrixEnum(with_metaclass(_MatrixEnumMeta, Enum)):
@@ -182,7 +584,9 @@ class MatrixEnum(with_metaclass(_MatrixEnumMeta, Enum)):
     The MatrixEnum class allows you to quickly (O(1)) access enum members by any attribute. In order for these
     accesses to be unambiguous, every attribute of every Member must be unique across the whole enum. This behavior is
     validated at class-compile time (which costs a bit of computation; as a result it is not recommended to
-    programmatically redeclare subclasses of MatrixEnum).
+    programmatically redeclare subclasses of MatrixEnum). Enums declared with `scoped=True` only need unique values per
+    attribute; they are looked up with `by(attr, value)` instead, and values shared across attributes can't be looked
+    up directly.
 
     To add non-unique member values, use the `extra` method of the Member class.
     These values can be accessed, but CANNOT be used to lookup an Enum members.
@@ -190,3 +594,886 @@ class MatrixEnum(with_metaclass(_MatrixEnumMeta, Enum)):
     If you need different fields on different members you may need a separate
     mapping object, separate functions on the enum class, or a more advanced Enum.
     """
+
+    def __getattr__(self, key):
+        # Only reached for missing attributes: Member attributes of lazily-defined enums are only set when finalized.
+        cls = type(self)
+        if cls._pending is None or key.startswith('__'):
+            raise AttributeError("'{}' object has no attribute '{}'".format(cls.__name__, key))
+        cls._finalize()
+        return getattr(self, key)
+
+    def __setattr__(self, key, value):
+        if key in type(self)._attribute_keys:
+            raise AttributeError("can't set attribute '{}'".format(key))
+        super(MatrixEnum, self).__setattr__(key, value)
+
+    def __delattr__(self, key):
+        if key in type(self)._attribute_keys:
+            raise AttributeError("can't delete attribute '{}'".format(key))
+        super(MatrixEnum, self).__delattr__(key)
+
+    # Members are singletons compared by identity, so hash them by identity too: Enum's Python-level `hash(name)`
+    # dominates the cost of dicts and sets keyed by members.
+    __hash__ = object.__hash__
+
+    def __reduce_ex__(self, protocol):
+        # Pickle as a reference to the class attribute, rather than a Member to be looked up on unpickling.
+        return getattr, (type(self), self._name_)
+
+    @classmethod
+    def get(cls, value, default=None):
+        """Look up a member by any addressable value or name, returning `default` instead of raising on a miss."""
+        try:
+            member = cls._lookup.get(value, _missing)
+        except TypeError:
+            # Unhashable values can't be in the index.
+            return default
+        if member is _missing:
+            if cls._pending is not None:
+                return cls._finalize().get(value, default)
+            member = cls._get_normalized(value)
+            return default if member is None else member
+        return member
+
+    @classmethod
+    def by(cls, attr, value):
+        """Look up a member by the value of one addressable attribute, or by name with `attr='name'`.
+
+        Unlike `MatrixEnum(value)`, only that attribute's values are searched. `MyEnum.by_<attr>(value)` does the same
+        for each addressable attribute.
+        """
+        try:
+            return cls._indexes[attr][value]
+        except (KeyError, TypeError):
+            pass
+        if cls._pending is not None:
+            return cls._finalize().by(attr, value)
+        if attr not in cls._indexes:
+            raise ValueError('Can\'t look up by {}: not an addressable key of {}.'.format(attr, cls.__name__))
+        raise ValueError('{!r} is not a valid {} {}'.format(value, cls.__name__, attr))
+
+    @classmethod
+    def from_code(cls, code):
+        """Look up a member by its integer code: the `code` attribute, or else the enum's only integer attribute.
+
+        Enums with an integer code replace this with a `from_code` accessor over a table of their members when they are
+        finalized. Dense codes, like 0..N or 1..N, are resolved by indexing a tuple rather than through a dict.
+        """
+        if cls._pending is not None:
+            return cls._finalize().from_code(code)
+        raise ValueError('{} has no integer code attribute.'.format(cls.__name__))
+
+    @classmethod
+    def pack_members(cls, members):
+        """Encode an iterable of members as a compact byte string of their ordinals, e.g. for task payloads.
+
+        Ordinals follow definition order (name order for class bodies on Python 2), so both ends need the same
+        definition of the enum.
+
+        Returns: bytes for `unpack_members`.
+        """
+        ordinals = cls._finalize()._ordinals
+        try:
+            packed = array(_ordinal_typecode(len(ordinals)), [ordinals[member] for member in members])
+        except KeyError as error:
+            raise ValueError('{!r} is not a member of {}.'.format(error.args[0], cls.__name__))
+        if sys.byteorder != 'little':  # pragma: no cover
+            packed.byteswap()
+        return packed.tostring() if PY2 else packed.tobytes()
+
+    @classmethod
+    def unpack_members(cls, data):
+        """Decode the output of `pack_members`.
+
+        Returns: a list of members.
+        """
+        by_ordinal = cls._finalize()._by_ordinal
+        packed = array(_ordinal_typecode(len(by_ordinal)))
+        try:
+            packed.fromstring(data) if PY2 else packed.frombytes(data)
+        except ValueError:
+            raise ValueError('Packed {} members have an invalid length.'.format(cls.__name__))
+        if sys.byteorder != 'little':  # pragma: no cover
+            packed.byteswap()
+        try:
+            return [by_ordinal[ordinal] for ordinal in packed]
+        except IndexError:
+            raise ValueError('Packed members are not {} members.'.format(cls.__name__))
+
+    @classmethod
+    def validate_all(cls):
+        """Finalize this enum and every subclass now, e.g. in CI, raising the first validation error.
+
+        Only needed for lazily-defined enums, which otherwise validate on first use.
+        """
+        cls._finalize()
+        for subclass in cls.__subclasses__():
+            subclass.validate_all()
+
+    @classmethod
+    def enable_stats(cls, timing=False, top_misses=10, callback=None):
+        """Start counting lookups into this enum and every subclass, including ones defined later.
+
+        Counts lookups and misses by value (`MatrixEnum(value)`, `in`, `get` and the bulk lookups), plus the
+        `top_misses` most frequently missed values. `timing=True` also adds up the time spent in lookups.
+        `callback(enum_class, value, hit, seconds)` is called after every lookup, e.g. to export metrics; `seconds`
+        is None unless `timing` is enabled. Enabling stats again starts counting from zero.
+        """
+        cls._stats_options = (timing, top_misses, callback)
+        cls._install_stats()
+        for subclass in cls.__subclasses__():
+            subclass.enable_stats(timing, top_misses, callback)
+
+    @classmethod
+    def disable_stats(cls):
+        """Stop counting lookups into this enum and every subclass."""
+        cls._stats_options = None
+        cls._install_stats()
+        for subclass in cls.__subclasses__():
+            subclass.disable_stats()
+
+    @classmethod
+    def stats(cls, reset=False):
+        """Lookup counts since `enable_stats` (or the last reset), or None if stats aren't enabled for this enum.
+
+        Returns: a dict of 'lookups', 'hits' and 'misses' counts, 'top_misses' as (value, count) pairs, most
+        frequent first, and 'seconds' spent in lookups (None unless timing is enabled).
+        """
+        lookup = cls._finalize()._lookup
+        if not isinstance(lookup, _InstrumentedLookup):
+            return None
+        return lookup.stats.snapshot(reset)
+
+    @classmethod
+    def lookup_many(cls, values, on_missing='raise', default=None):
+        """Look up a member for every item of an iterable, list or NumPy array of values.
+
+        `on_missing` decides what a value that isn't in the enum resolves to: 'raise' raises the same ValueError as
+        `MatrixEnum(value)`, 'default' substitutes `default` and 'none' substitutes None.
+
+        Returns: a list of members, or an object array of the same shape if `values` is a NumPy array.
+        """
+        fill = _fill_value(on_missing, default)
+        items = _as_items(values)
+        lookup = cls._finalize()._lookup
+        members = _probe_items(lookup, items, fill)
+        if cls._normalize is not None:
+            members = [
+                cls._get_normalized(item, fill) if member is fill else member for item, member in zip(items, members)
+            ]
+        if fill is _missing and any(member is _missing for member in members):
+            # Let the constructor produce the error (or resolve the value through `_missing_`).
+            members = [cls._call_missed(item) if member is _missing else member for item, member in zip(items, members)]
+        return _as_result(values, members, object)
+
+    @classmethod
+    def contains_many(cls, values):
+        """Check `in` for every item of an iterable, list or NumPy array of values.
+
+        Returns: a list of bools, or a boolean array of the same shape if `values` is a NumPy array.
+        """
+        items = _as_items(values)
+        lookup = cls._finalize()._lookup
+        mask = [member is not _missing for member in _probe_items(lookup, items, _missing)]
+        if cls._normalize is not None:
+            mask = [found or cls._get_normalized(item) is not None for item, found in zip(items, mask)]
+        return _as_result(values, mask, bool)
+
+    @classmethod
+    def translate(cls, values, src, dst, on_missing='raise', default=None):
+        """Convert values of one member attribute into another, e.g. database codes into titles.
+
+        `src` may be any addressable key or 'name'; `dst` may also be an extra key. The mapping for each (src, dst)
+        pair is computed once per enum. NumPy arrays are converted in a single vectorized pass: through a lookup
+        array when the `src` values are dense integers, by binary search when they are sortable, and through the
+        mapping otherwise. Misses are handled as in `lookup_many`.
+
+        Returns: a list of `dst` values, or an array of the same shape if `values` is a NumPy array.
+        """
+        fill = _fill_value(on_missing, default)
+        translation = cls._finalize()._translations.get((src, dst))
+        if translation is None:
+            if src not in cls._addressable_keys + ('name',):
+                raise ValueError('Can\'t translate from {}: not an addressable key of {}.'.format(src, cls.__name__))
+            if dst not in cls._addressable_keys + cls._extra_keys + ('name',):
+                raise ValueError('Can\'t translate to {}: not an attribute of {}.'.format(dst, cls.__name__))
+            translation = cls._translations.setdefault((src, dst), _Translation(cls, src, dst))
+        if np is not None and isinstance(values, np.ndarray):
+            return translation.translate_array(values, fill)
+        return translation.translate_items(_as_items(values), fill)
+
+    @classmethod
+    def codec(cls, attr):
+        """Encoder and decoder between members and the values of one addressable attribute (or 'name').
+
+        The codec holds precomputed tables in both directions and is cached per attribute. Its `default` method can
+        be passed to `json.dumps(..., default=...)` and orjson-style encoders to serialize members as `attr`.
+
+        Returns: an object with `encode`, `decode`, `encode_many`, `decode_many` and `default` methods.
+        """
+        codec = cls._finalize()._codecs.get(attr)
+        if codec is None:
+            if attr not in cls._indexes:
+                raise ValueError('Can\'t make a codec for {}: not an addressable key of {}.'.format(attr, cls.__name__))
+            codec = cls._codecs.setdefault(attr, _Codec(cls, attr))
+        return codec
+
+    @classmethod
+    def where(cls, **criteria):
+        """Find the members whose attributes equal all of `criteria`, e.g. `MyEnum.where(region='EU')`.
+
+        Intended for extras, whose inverted indexes are built with the enum, so results for a single extra are
+        precomputed and shared. Addressable attributes match at most one member each.
+
+        Returns: a tuple of members, in definition order.
+        """
+        cls._finalize()
+        matches = []
+        for key, value in iteritems(criteria):
+            index = cls._inverted_indexes.get(key)
+            if index is not None:
+                matches.append(_hashable_get(index, value, ((), frozenset())))
+            elif key in cls._indexes:
+                member = _hashable_get(cls._indexes[key], value, None)
+                matches.append(((), frozenset()) if member is None else ((member,), frozenset((member,))))
+            else:
+                raise ValueError('Can\'t filter by {}: not an attribute of {}.'.format(key, cls.__name__))
+        if not matches:
+            return cls._by_ordinal
+        matches.sort(key=lambda match: len(match[0]))
+        members, _ = matches[0]
+        if len(matches) == 1:
+            return members
+        return tuple(member for member in members if all(member in others for _, others in matches[1:]))
+
+    @classmethod
+    def from_records(cls, name, rows, key='NAME', extra=(), module=None, qualname=None, scoped=False,
+                     normalize=None):
+        """Create a MatrixEnum from an iterable of mappings, such as the rows of a data table.
+
+        The `key` entry of each row names the member, the `extra` entries are passed to `Member.extra` and the rest
+        make up the Member. Rows are validated in one pass as they are read, with the same errors as a class body.
+        `scoped` and `normalize` are as for the class keywords.
+
+        Returns: the new MatrixEnum subclass.
+        """
+        if module is None:
+            module = _caller_module()
+        members = (_record_member(row, key, extra) for row in rows)
+        return cls._from_members(name, members, module=module, qualname=qualname, scoped=scoped, normalize=normalize)
+
+    @classmethod
+    def from_csv(cls, name, path, addressable=None, extra=(), key='NAME', converters=None, module=None,
+                 qualname=None, scoped=False, normalize=None, encoding='utf-8'):
+        """Create a MatrixEnum from a CSV file with a header row, streaming its rows into validation.
+
+        `key` is the column naming each member, `addressable` the columns making up the Members (all other columns
+        by default) and `extra` the columns passed to `Member.extra`. `converters` maps columns to callables applied
+        to their text, e.g. `{'code': int}`. `path` may also be an open text file; files opened by path are read with
+        `encoding`. `scoped` and `normalize` are as for `from_records`. Invalid rows are reported with their line
+        number.
+
+        Returns: the new MatrixEnum subclass.
+        """
+        if module is None:
+            module = _caller_module()
+        with _open_text(path, encoding) as lines:
+            # Python 2's csv module only reads byte strings.
+            reader = csv.DictReader((_utf8(line) for line in lines) if PY2 else lines)
+            records = ((reader.line_num, row) for row in reader)
+            stream = _RecordStream(path, records, key, addressable, extra, converters, parse=_csv_row)
+            return stream.build(cls, name, module, qualname, scoped=scoped, normalize=normalize)
+
+    @classmethod
+    def from_jsonl(cls, name, path, addressable=None, extra=(), key='NAME', converters=None, module=None,
+                   qualname=None, scoped=False, normalize=None, encoding='utf-8'):
+        """Create a MatrixEnum from a JSON-lines file of objects, streaming them into validation.
+
+        Arguments are as for `from_csv`; blank lines are skipped.
+
+        Returns: the new MatrixEnum subclass.
+        """
+        if module is None:
+            module = _caller_module()
+        with _open_text(path, encoding) as lines:
+            records = ((number, line) for number, line in enumerate(lines, 1) if line.strip())
+            stream = _RecordStream(path, records, key, addressable, extra, converters, parse=_json_object)
+            return stream.build(cls, name, module, qualname, scoped=scoped, normalize=normalize)
+
+
+class MemberSet(object):
+    """Immutable set of members of one MatrixEnum, stored as an integer bitmask over member ordinals.
+
+    Supports `|`, `&`, `-`, `^`, subset comparisons, `in`, `len` and iteration (in definition order) like a
+    frozenset. Values may be members or anything that looks one up, e.g. `MemberSet(Channels, ['email', 2])`.
+
+    `int()` of a set is its bitmask, for storing in a database or cache; `MemberSet.from_mask` turns it back into a
+    set. Ordinals follow definition order, so only append members to enums whose masks are stored.
+    """
+
+    __slots__ = ('_enum_class', '_ordinals', '_mask')
+
+    def __init__(self, enum_class, values=()):
+        ordinals = enum_class._finalize()._ordinals
+        mask = 0
+        for value in values:
+            try:
+                mask |= 1 << ordinals[value]
+            except (KeyError, TypeError):
+                mask |= 1 << ordinals[enum_class(value)]
+        self._enum_class = enum_class
+        self._ordinals = ordinals
+        self._mask = mask
+
+    @classmethod
+    def from_mask(cls, enum_class, mask):
+        """Create a set from the bitmask of `int(member_set)`."""
+        if not isinstance(mask, integer_types) or mask < 0 or mask >> len(enum_class._finalize()._by_ordinal):
+            raise ValueError('{!r} is not a valid {} member mask.'.format(mask, enum_class.__name__))
+        member_set = cls.__new__(cls)
+        member_set._enum_class = enum_class
+        member_set._ordinals = enum_class._ordinals
+        member_set._mask = mask
+        return member_set
+
+    @property
+    def enum_class(self):
+        return self._enum_class
+
+    def _other_mask(self, other):
+        if isinstance(other, MemberSet) and other._enum_class is self._enum_class:
+            return other._mask
+        return None
+
+    def _compared_mask(self, other):
+        mask = self._other_mask(other)
+        if mask is None and PY2:  # pragma: no cover
+            # Python 2 would fall back to comparing the objects' types instead of raising.
+            raise TypeError('unorderable types: MemberSet and {}'.format(type(other).__name__))
+        return mask
+
+    def _combine(self, other, combine):
+        mask = self._other_mask(other)
+        if mask is None:
+            return NotImplemented
+        return MemberSet.from_mask(self._enum_class, combine(self._mask, mask))
+
+    def __or__(self, other):
+        return self._combine(other, lambda left, right: left | right)
+
+    def __and__(self, other):
+        return self._combine(other, lambda left, right: left & right)
+
+    def __sub__(self, other):
+        return self._combine(other, lambda left, right: left & ~right)
+
+    def __xor__(self, other):
+        return self._combine(other, lambda left, right: left ^ right)
+
+    def __le__(self, other):
+        mask = self._compared_mask(other)
+        return NotImplemented if mask is None else self._mask & ~mask == 0
+
+    def __lt__(self, other):
+        mask = self._compared_mask(other)
+        return NotImplemented if mask is None else self._mask != mask and self._mask & ~mask == 0
+
+    def __ge__(self, other):
+        mask = self._compared_mask(other)
+        return NotImplemented if mask is None else mask & ~self._mask == 0
+
+    def __gt__(self, other):
+        mask = self._compared_mask(other)
+        return NotImplemented if mask is None else self._mask != mask and mask & ~self._mask == 0
+
+    def __eq__(self, other):
+        mask = self._other_mask(other)
+        return NotImplemented if mask is None else self._mask == mask
+
+    def __ne__(self, other):
+        mask = self._other_mask(other)
+        return NotImplemented if mask is None else self._mask != mask
+
+    def __hash__(self):
+        return hash((self._enum_class, self._mask))
+
+    def __contains__(self, value):
+        try:
+            return self._mask >> self._ordinals[value] & 1 == 1
+        except (KeyError, TypeError):
+            member = self._enum_class.get(value)
+        return member is not None and self._mask >> self._ordinals[member] & 1 == 1
+
+    def __iter__(self):
+        by_ordinal = self._enum_class._by_ordinal
+        # One pass over the binary digits, least significant (ordinal 0) first.
+        for ordinal, bit in enumerate(reversed('{:b}'.format(self._mask))):
+            if bit == '1':
+                yield by_ordinal[ordinal]
+
+    def __len__(self):
+        return bin(self._mask).count('1')
+
+    def __bool__(self):
+        return self._mask != 0
+
+    __nonzero__ = __bool__
+
+    def __int__(self):
+        return self._mask
+
+    def __reduce__(self):
+        return _rebuild_member_set, (self._enum_class, self._mask)
+
+    def __repr__(self):
+        return 'MemberSet({}, {!r})'.format(self._enum_class.__name__, list(self))
+
+
+def _rebuild_member_set(enum_class, mask):
+    return MemberSet.from_mask(enum_class, mask)
+
+
+class _Codec(object):
+    """Converts members of one MatrixEnum to and from the values of one of their attributes."""
+
+    def __init__(self, enum_class, attr):
+        self.enum_class = enum_class
+        self.attr = attr
+        self.decoding = enum_class._indexes[attr]
+        self.encoding = dict((member, value) for value, member in iteritems(self.decoding))
+
+    def _not_a_member(self, value):
+        return ValueError('{!r} is not a member of {}.'.format(value, self.enum_class.__name__))
+
+    def _not_a_value(self, value):
+        return ValueError('{!r} is not a valid {} {}'.format(value, self.enum_class.__name__, self.attr))
+
+    def encode(self, member):
+        try:
+            return self.encoding[member]
+        except (KeyError, TypeError):
+            pass
+        raise self._not_a_member(member)
+
+    def decode(self, value):
+        try:
+            return self.decoding[value]
+        except (KeyError, TypeError):
+            pass
+        raise self._not_a_value(value)
+
+    def encode_many(self, members):
+        """Returns: a list of the values of `members`."""
+        encoding = self.encoding
+        members = _as_items(members)
+        try:
+            return [encoding[member] for member in members]
+        except (KeyError, TypeError):
+            pass
+        # Find the culprit for the error message.
+        for member in members:
+            self.encode(member)
+
+    def decode_many(self, values):
+        """Returns: a list of the members with `values`."""
+        decoding = self.decoding
+        values = _as_items(values)
+        try:
+            return [decoding[value] for value in values]
+        except (KeyError, TypeError):
+            pass
+        for value in values:
+            self.decode(value)
+
+    def default(self, obj):
+        """JSON encoder hook: members of the enum are serialized as their `attr` value."""
+        try:
+            return self.encoding[obj]
+        except (KeyError, TypeError):
+            pass
+        raise TypeError('Object of type {} is not JSON serializable'.format(type(obj).__name__))
+
+
+class _Translation(object):
+    """Precomputed mapping between two member attributes of one MatrixEnum."""
+
+    def __init__(self, enum_class, src, dst):
+        self.enum_class = enum_class
+        self.src = src
+        self.mapping = dict((getattr(member, src), getattr(member, dst)) for member in enum_class)
+        # Built up front, so translations are never modified once they are shared.
+        self._tables = self._build_tables() if np is not None else None
+
+    def _missing_error(self, value):
+        return ValueError('{!r} is not a valid {} {}'.format(value, self.enum_class.__name__, self.src))
+
+    def translate_items(self, items, fill):
+        mapping = self.mapping
+        try:
+            results = [mapping.get(item, fill) for item in items]
+        except TypeError:
+            results = [_hashable_get(mapping, item, fill) for item in items]
+        if fill is _missing:
+            for item, result in zip(items, results):
+                if result is _missing:
+                    raise self._missing_error(item)
+        return results
+
+    def _build_tables(self):
+        """Build the NumPy tables: a dense lookup array, sorted keys for binary search, or neither."""
+        keys = list(self.mapping)
+        targets = _target_array([self.mapping[key] for key in keys])
+        low = _dense_low(keys)
+        if low is not None:
+            size = max(keys) - low + 1
+            positions = np.zeros(size, dtype=np.intp)
+            present = np.zeros(size, dtype=bool)
+            offsets = np.array(keys, dtype=np.int64) - low
+            positions[offsets] = np.arange(len(keys))
+            present[offsets] = True
+            return 'dense', (low, positions, present), targets
+        try:
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+        except TypeError:
+            return None, None, targets
+        sorted_keys = np.array([keys[i] for i in order])
+        if not keys or sorted_keys.ndim != 1 or sorted_keys.dtype.kind not in 'iufUS':
+            return None, None, targets
+        return 'sorted', sorted_keys, targets[np.array(order, dtype=np.intp)]
+
+    def translate_array(self, values, fill):
+        kind, table, targets = self._tables
+        # Work on at least one dimension so 0-d arrays can be masked, and give results the input's shape.
+        shape = values.shape
+        values = np.atleast_1d(values)
+
+        if kind == 'dense' and values.dtype.kind in 'iu':
+            low, positions, present = table
+            offsets = values.astype(np.int64) - low
+            found = (offsets >= 0) & (offsets < len(positions))
+            offsets[~found] = 0
+            found &= present[offsets]
+            results = targets[positions[offsets]]
+        elif kind == 'sorted' and _comparable_kinds(table.dtype.kind, values.dtype.kind):
+            positions = np.minimum(np.searchsorted(table, values), len(table) - 1)
+            found = table[positions] == values
+            results = targets[positions]
+        else:
+            absent = object()
+            results = self.translate_items(values.ravel().tolist(), absent)
+            found = np.array([result is not absent for result in results], dtype=bool).reshape(values.shape)
+            results = _as_result(values, results, object)
+            if found.all():
+                results = results.astype(targets.dtype)
+
+        if not found.all():
+            if fill is _missing:
+                raise self._missing_error(values[~found].ravel().tolist()[0])
+            results = results.astype(object)
+            results[~found] = fill
+        return results.reshape(shape)
+
+
+class _LookupStats(object):
+    """Lookup counters of one MatrixEnum, with a bounded count of the most frequently missed values."""
+
+    def __init__(self, enum_class, timing, top_misses, callback):
+        self.enum_class = enum_class
+        self.timing = timing
+        self.top_misses = top_misses
+        self.callback = callback
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.lookups = 0
+        self.misses = 0
+        self.seconds = 0.0
+        self.missed = dict()
+
+    def record(self, value, hit, start, hashable=True):
+        seconds = None if start is None else _clock() - start
+        with self._lock:
+            self.lookups += 1
+            if seconds is not None:
+                self.seconds += seconds
+            if not hit:
+                self.misses += 1
+                if hashable:
+                    self._count_miss(value)
+        if self.callback is not None:
+            self.callback(self.enum_class, value, hit, seconds)
+
+    def _count_miss(self, value):
+        # Space-Saving: once `top_misses` values are tracked, a new value replaces the least frequent one and
+        # inherits its count, so frequent values are kept (with counts overestimated by at most the evicted count).
+        missed = self.missed
+        if value in missed:
+            missed[value] += 1
+        elif len(missed) < self.top_misses:
+            missed[value] = 1
+        elif missed:
+            evicted = min(missed, key=missed.get)
+            missed[value] = missed.pop(evicted) + 1
+
+    def snapshot(self, reset=False):
+        with self._lock:
+            stats = {
+                'lookups': self.lookups,
+                'hits': self.lookups - self.misses,
+                'misses': self.misses,
+                'top_misses': sorted(self.missed.items(), key=lambda item: -item[1]),
+                'seconds': self.seconds if self.timing else None,
+            }
+            if reset:
+                self._reset()
+        return stats
+
+
+class _InstrumentedLookup(dict):
+    """Lookup index of a MatrixEnum with stats enabled, recording every lookup it answers.
+
+    Values missing from the index are looked up with `fallback(value, default)`, if given, before being recorded.
+    """
+
+    def __init__(self, lookup, stats, fallback=None):
+        super(_InstrumentedLookup, self).__init__(lookup)
+        self.stats = stats
+        self.fallback = fallback
+
+    def _probe(self, value):
+        stats = self.stats
+        start = _clock() if stats.timing else None
+        try:
+            member = dict.get(self, value, _missing)
+        except TypeError:
+            stats.record(value, False, start, hashable=False)
+            raise
+        if member is _missing and self.fallback is not None:
+            member = self.fallback(value, _missing)
+        stats.record(value, member is not _missing, start)
+        return member
+
+    def __getitem__(self, value):
+        member = self._probe(value)
+        if member is _missing:
+            raise KeyError(value)
+        return member
+
+    def __contains__(self, value):
+        return self._probe(value) is not _missing
+
+    def get(self, value, default=None):
+        member = self._probe(value)
+        return default if member is _missing else member
+
+
+def _scoped_lookup(enum_class, key, index):
+    """The `by_<key>` accessor of a MatrixEnum: `by(key, value)` without looking up the key's index first."""
+    def lookup(value):
+        try:
+            return index[value]
+        except (KeyError, TypeError):
+            pass
+        raise ValueError('{!r} is not a valid {} {}'.format(value, enum_class.__name__, key))
+
+    lookup.__name__ = str('by_' + key)
+    return lookup
+
+
+def _pending_lookup(enum_class, name):
+    """An accessor of a lazily-defined MatrixEnum that finalizes it and calls the accessor that replaced it."""
+    def lookup(value):
+        return getattr(enum_class._finalize(), name)(value)
+
+    lookup.__name__ = str(name)
+    return lookup
+
+
+def _code_lookup(enum_class, key, offset, table):
+    """The `from_code` accessor of a MatrixEnum: a lookup in its code table, without reading class attributes."""
+    def from_code(code):
+        try:
+            if code >= offset:
+                member = table[code - offset]
+                if member is not None:
+                    return member
+        except (IndexError, KeyError, TypeError):
+            pass
+        raise ValueError('{!r} is not a valid {} {}'.format(code, enum_class.__name__, key))
+
+    from_code.__name__ = str('from_code')
+    return from_code
+
+
+def _inverted_index(members, key):
+    """Map each value of attribute `key` to the members having it, as a tuple in order and a frozenset."""
+    groups = dict()
+    for member in members:
+        groups.setdefault(getattr(member, key), []).append(member)
+    return dict((value, (tuple(group), frozenset(group))) for value, group in iteritems(groups))
+
+
+def _caller_module(depth=2):
+    """Name of the module calling into the public API, so generated enums pickle like class-body ones."""
+    try:
+        return sys._getframe(depth).f_globals['__name__']
+    except (AttributeError, ValueError, KeyError):  # pragma: no cover
+        return None
+
+
+def _record_member(row, key, extra):
+    row = dict(row)
+    name = row.pop(key)
+    extras = dict((column, row.pop(column)) for column in extra)
+    member = Member(**row)
+    return name, member.extra(**extras) if extra else member
+
+
+class _RecordStream(object):
+    """(name, Member) pairs read from numbered file records, tracking the current line for error messages."""
+
+    def __init__(self, path, records, key, addressable, extra, converters, parse=None):
+        self.path = path
+        self.records = records
+        self.parse = parse
+        self.key = key
+        self.columns = None if addressable is None else (key,) + tuple(addressable) + tuple(extra)
+        self.extra = extra
+        self.converters = converters or dict()
+        self.line = None
+
+    def __iter__(self):
+        key, columns, extra, converters, parse = self.key, self.columns, self.extra, self.converters, self.parse
+        for line, row in self.records:
+            self.line = line
+            try:
+                if parse is not None:
+                    row = parse(row)
+                if columns is not None:
+                    row = dict((column, row[column]) for column in columns)
+                if converters:
+                    row = dict((column, converters[column](value) if column in converters else value)
+                               for column, value in iteritems(row))
+                yield _record_member(row, key, extra)
+            except KeyError as error:
+                raise ValueError('Missing column {}.'.format(error))
+            except TypeError as error:
+                # E.g. unhashable values, or converters given a value of the wrong type.
+                raise ValueError('Invalid row: {}'.format(error))
+        self.line = None
+
+    def build(self, enum_class, name, module, qualname, **options):
+        try:
+            return enum_class._from_members(name, self, module=module, qualname=qualname, **options)
+        except ValueError as error:
+            if self.line is None:
+                raise
+            message = 'line {}: {}'.format(self.line, error)
+            source = getattr(self.path, 'name', self.path)
+            if isinstance(source, string_types):
+                message = '{}, {}'.format(source, message)
+            raise_from(ValueError(message), error)
+
+
+@contextmanager
+def _open_text(path, encoding):
+    if hasattr(path, 'read'):
+        yield path
+    else:
+        with io.open(path, encoding=encoding, newline='') as lines:
+            yield lines
+
+
+def _utf8(text):  # pragma: no cover
+    # Only used on Python 2.
+    return text.encode('utf-8') if isinstance(text, text_type) else text
+
+
+def _csv_row(row):
+    """Check that a `csv.DictReader` row has as many fields as the header."""
+    if None in row:
+        raise ValueError('Row has more fields than the header.')
+    if None in row.values():
+        raise ValueError('Row has fewer fields than the header.')
+    if PY2:  # pragma: no cover
+        row = dict((column.decode('utf-8'), value.decode('utf-8')) for column, value in iteritems(row))
+    return row
+
+
+def _json_object(line):
+    row = json.loads(line)
+    if not isinstance(row, dict):
+        raise ValueError('Expected a JSON object, got {}.'.format(type(row).__name__))
+    return row
+
+
+def _ordinal_typecode(count):
+    """The smallest unsigned array typecode that can hold ordinals for `count` members."""
+    for typecode in ('B', 'H', 'I', 'L'):
+        if count <= 1 << (8 * array(typecode).itemsize):
+            return typecode
+    return 'Q'  # pragma: no cover
+
+
+def _fill_value(on_missing, default):
+    """What a miss resolves to under a given `on_missing` policy; the `_missing` sentinel means 'raise'."""
+    if on_missing not in _on_missing_choices:
+        raise ValueError(
+            'on_missing must be one of {}, got {!r}.'.format(', '.join(_on_missing_choices), on_missing),
+        )
+    return _missing if on_missing == 'raise' else default if on_missing == 'default' else None
+
+
+def _probe_items(lookup, items, default):
+    """`lookup.get(item, default)` for each of `items`, which may include unhashable values, probing each item once."""
+    if type(lookup) is dict:
+        get = lookup.get
+        try:
+            return [get(item, default) for item in items]
+        except TypeError:
+            pass
+    # Instrumented lookups count every probe, so they don't get a second pass after an unhashable value.
+    return [_hashable_get(lookup, item, default) for item in items]
+
+
+def _hashable_get(mapping, item, default):
+    try:
+        return mapping.get(item, default)
+    except TypeError:
+        return default
+
+
+def _target_array(values):
+    """An array of translation targets: typed if they are all one scalar type, otherwise of objects."""
+    types = set(type(value) for value in values)
+    if len(types) == 1 and types.pop() in integer_types + string_types + (binary_type, float, bool):
+        return np.array(values)
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _comparable_kinds(table_kind, values_kind):
+    """Whether `searchsorted` can compare values of these NumPy dtype kinds meaningfully."""
+    numeric = 'iuf'
+    return (table_kind in numeric and values_kind in numeric) or table_kind == values_kind
+
+
+def _as_items(values):
+    """Flatten NumPy arrays to lists of Python scalars and materialize other iterables, so they can be walked twice."""
+    if np is not None and isinstance(values, np.ndarray):
+        return values.ravel().tolist()
+    elif isinstance(values, (list, tuple)):
+        return values
+    return list(values)
+
+
+def _as_result(values, results, dtype):
+    """Shape per-item results like `values`: an array for NumPy input, a list otherwise."""
+    if np is not None and isinstance(values, np.ndarray):
+        array = np.empty(len(results), dtype=dtype)
+        array[:] = results
+        return array.reshape(values.shape)
+    return results
@@ -23,6 +23,9 @@ setup(
         'enum34>=1.1.6;python_version<"3.4"',
     ],
     extras_require={
+        'numpy': [
+            'numpy',
+        ],
         'dev': [
             'tox~=3.13',
         ],
@@ -1,17 +1,96 @@
 from __future__ import unicode_literals
 
+import io
+import json
+import os
+import pickle
+import shutil
 import sys
+import tempfile
+import threading
 from unittest import TestCase
 
+try:
+    from unittest import mock
+except ImportError:  # pragma: no cover
+    import mock
+
 import pytest
+from six import PY2
+
+from matrix_enum import MatrixEnum, Member, MemberSet, matrix_enum
+
+
+def _make_enum(count, name='GeneratedEnum', **options):
+    return _define_enum(name, [
+        ('M{}'.format(i), Member(code=i, label='label {}'.format(i))) for i in range(count)
+    ], **options)
 
-from matrix_enum import MatrixEnum, Member
+
+def _define_enum(name, members, **options):
+    """Create a MatrixEnum from (name, value) pairs with class keywords, which Python 2 can't parse in a class body."""
+    metacls = type(MatrixEnum)
+    classdict = metacls.__prepare__(name, (MatrixEnum,), **options)
+    for key, value in members:
+        classdict[key] = value
+    if PY2:  # pragma: no cover
+        # Keep definition order, which Python 2 class bodies don't preserve.
+        classdict['_order_'] = [key for key, value in members]
+    return metacls(str(name), (MatrixEnum,), classdict, **options)
 
 
 class TestWorkingEnums(TestCase):
     def test_member_hashing(self):
         assert hash(Member(foo=1)) != hash(Member(bar=1))
 
+    def test_member_content_hashing(self):
+        assert hash(Member(foo=1)) == hash(Member(foo=1))
+        assert hash(Member(foo=1)) != hash(Member(foo=2))
+        assert hash(Member(foo=1).extra(bar=1)) != hash(Member(foo=1).extra(bar=2))
+        assert Member(foo=1).extra(bar=1) == Member(foo=1).extra(bar=1)
+        assert Member(foo=1).extra(bar=1) != Member(foo=1).extra(bar=2)
+
+    def test_member_layout(self):
+        member = Member(code=1, description='one').extra(foo='bar')
+        assert not hasattr(member, '__dict__')
+        assert member.code == 1
+        assert member.description == 'one'
+        assert member.foo == 'bar'
+        assert member._addressable == {'code': 1, 'description': 'one'}
+        assert member._extra_homomorphic == {'foo': 'bar'}
+        with pytest.raises(AttributeError):
+            member.missing
+        # Members with the same keys share one key schema.
+        assert Member(description='two', code=2)._keys is member._keys
+        assert Member(code=1, description='one').extra(foo='bar') == member
+
+    def test_member_pickling(self):
+        for member in (Member(code=1), Member(code=1).extra(foo='bar'), Member(code=1).extra()):
+            for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+                copied = pickle.loads(pickle.dumps(member, protocol))
+                assert copied == member
+                assert hash(copied) == hash(member)
+        with pytest.raises(ValueError, match=r"Can't set extras twice\."):
+            pickle.loads(pickle.dumps(Member(code=1).extra())).extra(foo='bar')
+
+    def test_member_value_lookup_stays_flat(self):
+        # Enum's own value map is keyed on Members; count the equality checks each lookup costs.
+        compares = []
+        original_eq = Member.__eq__
+
+        def counting_eq(self, other):
+            compares.append(1)
+            return original_eq(self, other)
+
+        for count in (10, 5000):
+            enum_class = _make_enum(count)
+            del compares[:]
+            with mock.patch.object(Member, '__eq__', counting_eq):
+                for member in enum_class:
+                    equal_value = Member(code=member.code, label=member.label)
+                    assert enum_class._value2member_map_[equal_value] is member
+            assert len(compares) <= 2 * count
+
     def test_simple_enum(self):
         class WorkingEnum(MatrixEnum):
             ONE = Member(code=1, description='one', plain_text='plaintext')
@@ -45,6 +124,42 @@ class TestWorkingEnums(TestCase):
         # TODO: Port and test or kill?
         # assert fully_qualified_name(WorkingEnum.ONE) == 'tests.test_enums.WorkingEnum'
 
+    def test_value_index(self):
+        class WorkingEnum(MatrixEnum):
+            ONE = Member(code=1, description='one')
+            TWO = Member(code=2, description='two')
+
+        for member in WorkingEnum:
+            for item in (member.code, member.description, member.name, member, member.value):
+                assert WorkingEnum(item) is member
+        assert WorkingEnum._lookup[1] is WorkingEnum.ONE
+        assert WorkingEnum._lookup['TWO'] is WorkingEnum.TWO
+
+        for value in (3, ['unhashable']):
+            with pytest.raises(ValueError) as info:
+                WorkingEnum(value)
+            # Not chained to the index miss.
+            assert getattr(info.value, '__context__', None) is None
+
+    def test_read_only_attributes(self):
+        class WorkingEnum(MatrixEnum):
+            ONE = Member(code=1).extra(foo='bar')
+
+        assert vars(WorkingEnum.ONE)['code'] == 1
+        assert vars(WorkingEnum.ONE)['foo'] == 'bar'
+        with pytest.raises(AttributeError, match=r"can't set attribute u?'code'"):
+            WorkingEnum.ONE.code = 2
+        with pytest.raises(AttributeError, match=r"can't set attribute u?'foo'"):
+            WorkingEnum.ONE.foo = 'baz'
+        with pytest.raises(AttributeError, match=r"can't delete attribute u?'code'"):
+            del WorkingEnum.ONE.code
+        assert WorkingEnum.ONE.code == 1
+        assert WorkingEnum.ONE.foo == 'bar'
+
+        WorkingEnum.ONE.cache = 'allowed'
+        del WorkingEnum.ONE.cache
+        assert not hasattr(WorkingEnum.ONE, 'cache')
+
     def test_additional_functions(self):
         class WorkingEnum(MatrixEnum):
             ONE = Member(code=1)
@@ -83,6 +198,40 @@ class TestWorkingEnums(TestCase):
         # Enum methods should not be `in` the enum
         assert MyEnum.test_func not in MyEnum
 
+    def test_contains_unhashable(self):
+        class MyEnum(MatrixEnum):
+            ONE = Member(code=1)
+
+        assert ['unhashable'] not in MyEnum
+        assert {} not in MyEnum
+
+    def test_get(self):
+        class MyEnum(MatrixEnum):
+            ONE = Member(code=1, description='one').extra(foo='bar')
+            TWO = Member(code=2, description='two').extra(foo='baz')
+
+        assert MyEnum.get(1) is MyEnum.ONE
+        assert MyEnum.get('two') is MyEnum.TWO
+        assert MyEnum.get('TWO') is MyEnum.TWO
+        assert MyEnum.get(MyEnum.ONE) is MyEnum.ONE
+        assert MyEnum.get(3) is None
+        assert MyEnum.get('bar') is None
+        assert MyEnum.get(3, MyEnum.ONE) is MyEnum.ONE
+        assert MyEnum.get(['unhashable'], 'default') == 'default'
+
+    def test_api_names_as_keys(self):
+        # Member attributes live on the members, so they don't hide the class API of the same name.
+        class MyEnum(MatrixEnum):
+            ONE = Member(get='one', translate=1).extra(where='here')
+            TWO = Member(get='two', translate=2).extra(where='there')
+
+        assert MyEnum.ONE.get == 'one'
+        assert MyEnum.TWO.where == 'there'
+        assert MyEnum.get('two') is MyEnum.TWO
+        assert MyEnum.by_get('one') is MyEnum.ONE
+        assert MyEnum.translate([1, 2], 'translate', 'get') == ['one', 'two']
+        assert MyEnum.where(where='here') == (MyEnum.ONE,)
+
     def test_none_values(self):
         class MyEnum(MatrixEnum):
             ONE = Member(code=1)
@@ -101,6 +250,975 @@ class TestWorkingEnums(TestCase):
         assert full_name == 'tests.test_enum.MyEnum'
 
 
+class TestBulkLookups(TestCase):
+    class MyEnum(MatrixEnum):
+        ONE = Member(code=1, description='one')
+        TWO = Member(code=2, description='two')
+
+    def test_lookup_many(self):
+        MyEnum = self.MyEnum
+        assert MyEnum.lookup_many([1, 'two', 'ONE', MyEnum.TWO]) == [MyEnum.ONE, MyEnum.TWO, MyEnum.ONE, MyEnum.TWO]
+        assert MyEnum.lookup_many(iter((2, 1))) == [MyEnum.TWO, MyEnum.ONE]
+        assert MyEnum.lookup_many([]) == []
+
+        with pytest.raises(ValueError, match=r"3 is not a valid") as info:
+            MyEnum.lookup_many([1, 3])
+        assert getattr(info.value, '__context__', None) is None
+        with pytest.raises(ValueError, match=r"is not a valid"):
+            MyEnum.lookup_many([1, ['unhashable']])
+
+        assert MyEnum.lookup_many([1, 3], on_missing='none') == [MyEnum.ONE, None]
+        assert MyEnum.lookup_many([1, 3], on_missing='none', default=MyEnum.TWO) == [MyEnum.ONE, None]
+        assert MyEnum.lookup_many([1, 3], on_missing='default', default=MyEnum.TWO) == [MyEnum.ONE, MyEnum.TWO]
+        assert MyEnum.lookup_many([['unhashable'], 2], on_missing='default', default=0) == [0, MyEnum.TWO]
+
+        with pytest.raises(ValueError, match=r"on_missing must be one of raise, default, none, got u?'skip'."):
+            MyEnum.lookup_many([1], on_missing='skip')
+
+    def test_contains_many(self):
+        MyEnum = self.MyEnum
+        assert MyEnum.contains_many([1, 3, 'two', MyEnum.ONE]) == [True, False, True, True]
+        assert MyEnum.contains_many(iter([['unhashable'], 'ONE'])) == [False, True]
+
+    def test_numpy_arrays(self):
+        np = pytest.importorskip('numpy')
+        MyEnum = self.MyEnum
+
+        members = MyEnum.lookup_many(np.array([[1, 2], [2, 1]]))
+        assert members.dtype == object
+        assert members.tolist() == [[MyEnum.ONE, MyEnum.TWO], [MyEnum.TWO, MyEnum.ONE]]
+        assert MyEnum.lookup_many(np.array(['one', 'three']), on_missing='none').tolist() == [MyEnum.ONE, None]
+
+        mask = MyEnum.contains_many(np.array([1, 3, 2]))
+        assert mask.dtype == bool
+        assert mask.tolist() == [True, False, True]
+
+    def test_without_numpy(self):
+        with mock.patch.object(matrix_enum, 'np', None):
+            assert self.MyEnum.contains_many((1, 3)) == [True, False]
+
+
+class TestTranslate(TestCase):
+    class MyEnum(MatrixEnum):
+        ONE = Member(digit=1, title='one', roman='I').extra(paws=4)
+        TWO = Member(digit=2, title='two', roman='II').extra(paws=4)
+        THREE = Member(digit=3, title='three', roman='III').extra(paws=0)
+
+    class SparseEnum(MatrixEnum):
+        SMALL = Member(code=-5, label=(1, 2))
+        LARGE = Member(code=10 ** 6, label=(3, 4))
+
+    class MixedEnum(MatrixEnum):
+        ONE = Member(code=1, label='one')
+        NONE = Member(code=None, label='none')
+
+    def test_translate_items(self):
+        MyEnum = self.MyEnum
+        assert MyEnum.translate([1, 3], 'digit', 'title') == ['one', 'three']
+        assert MyEnum.translate(iter(['I', 'II']), 'roman', 'paws') == [4, 4]
+        assert MyEnum.translate(('TWO',), 'name', 'digit') == [2]
+        assert MyEnum.translate(['two'], 'title', 'name') == ['TWO']
+        assert MyEnum.translate([1, 4], 'digit', 'title', on_missing='none') == ['one', None]
+        assert MyEnum.translate([4, ['unhashable']], 'digit', 'title', on_missing='default', default='?') == ['?', '?']
+        assert self.MixedEnum.translate([None, 1], 'code', 'label') == ['none', 'one']
+
+        with pytest.raises(ValueError, match=r"4 is not a valid MyEnum digit"):
+            MyEnum.translate([1, 4], 'digit', 'title')
+        with pytest.raises(ValueError, match=r"Can't translate from paws: not an addressable key of MyEnum."):
+            MyEnum.translate([4], 'paws', 'title')
+        with pytest.raises(ValueError, match=r"Can't translate to value: not an attribute of MyEnum."):
+            MyEnum.translate([1], 'digit', 'value')
+
+    def test_translate_arrays(self):
+        np = pytest.importorskip('numpy')
+        MyEnum = self.MyEnum
+
+        # Dense integer codes go through a lookup array.
+        titles = MyEnum.translate(np.array([[1, 2], [3, 3]]), 'digit', 'title')
+        assert titles.shape == (2, 2)
+        assert titles.tolist() == [['one', 'two'], ['three', 'three']]
+        assert MyEnum.translate(np.array([0, 1, 9], dtype=np.uint8), 'digit', 'roman', on_missing='none').tolist() == [
+            None, 'I', None,
+        ]
+        with pytest.raises(ValueError, match=r"9 is not a valid MyEnum digit"):
+            MyEnum.translate(np.array([1, 9]), 'digit', 'title')
+
+        # 0-d arrays give 0-d results.
+        title = MyEnum.translate(np.array(1), 'digit', 'title')
+        assert title.shape == ()
+        assert title.item() == 'one'
+        assert MyEnum.translate(np.array(9), 'digit', 'title', on_missing='none').item() is None
+        assert MyEnum.translate(np.array('II'), 'roman', 'digit').item() == 2
+        with pytest.raises(ValueError, match=r"9 is not a valid MyEnum digit"):
+            MyEnum.translate(np.array(9), 'digit', 'title')
+
+        # Strings and sparse codes go through binary search.
+        digits = MyEnum.translate(np.array(['III', 'I']), 'roman', 'digit')
+        assert digits.dtype.kind == 'i'
+        assert digits.tolist() == [3, 1]
+        assert MyEnum.translate(np.array(['I', 'X']), 'roman', 'paws', on_missing='default', default=-1).tolist() == [
+            4, -1,
+        ]
+        with pytest.raises(ValueError, match=r"u?'X' is not a valid MyEnum roman"):
+            MyEnum.translate(np.array(['X']), 'roman', 'paws')
+        labels = self.SparseEnum.translate(np.array([10 ** 6, -5]), 'code', 'label')
+        assert labels.dtype == object
+        assert labels.tolist() == [(3, 4), (1, 2)]
+
+        # Anything else goes through the mapping.
+        assert MyEnum.translate(np.array([1.0, 2.0]), 'digit', 'name').tolist() == ['ONE', 'TWO']
+        assert MyEnum.translate(np.array([1.0, 2.5]), 'digit', 'name', on_missing='none').tolist() == ['ONE', None]
+        pairs = np.empty(2, dtype=object)
+        pairs[:] = [(1, 2), (3, 4)]
+        assert self.SparseEnum.translate(pairs, 'label', 'code').tolist() == [-5, 10 ** 6]
+        with pytest.raises(ValueError, match=r"2 is not a valid MixedEnum code"):
+            self.MixedEnum.translate(np.array([None, 2]), 'code', 'label')
+        assert self.MixedEnum.translate(np.array([None, 1]), 'code', 'label').tolist() == ['none', 'one']
+
+    def test_translate_without_numpy(self):
+        with mock.patch.object(matrix_enum, 'np', None):
+            assert self.MyEnum.translate((1, 2), 'digit', 'roman') == ['I', 'II']
+
+
+class TestFromRecords(TestCase):
+    rows = [
+        {'NAME': 'ONE', 'digit': 1, 'title': 'one', 'paws': 4},
+        {'NAME': 'TWO', 'digit': 2, 'title': 'two', 'paws': 4},
+    ]
+
+    def test_from_records(self):
+        MyEnum = MatrixEnum.from_records('MyEnum', iter(self.rows), extra=['paws'])
+        assert issubclass(MyEnum, MatrixEnum)
+        assert MyEnum.__name__ == 'MyEnum'
+        assert MyEnum.__module__ == __name__
+        assert [member.name for member in MyEnum] == ['ONE', 'TWO']
+        assert MyEnum(2) is MyEnum('two') is MyEnum.TWO
+        assert MyEnum.ONE.paws == 4
+        assert MyEnum.ONE.value == Member(digit=1, title='one').extra(paws=4)
+        assert MyEnum.get(4) is None
+
+        NoExtras = MatrixEnum.from_records(
+            'NoExtras', [{'id': 'A', 'code': 1}], key='id', module='elsewhere', qualname='Outer.NoExtras',
+        )
+        assert NoExtras.A.code == 1
+        assert NoExtras.__module__ == 'elsewhere'
+        assert NoExtras.__qualname__ == 'Outer.NoExtras'
+        assert MatrixEnum.from_records('Empty', []).get(1) is None
+
+    def test_from_records_errors(self):
+        with pytest.raises(
+            ValueError,
+            match=r'Attribute value "one" of Member TWO is ambiguous with an attribute of Member ONE.',
+        ):
+            MatrixEnum.from_records('BadEnum', [{'NAME': 'ONE', 'code': 1, 'description': 'one'},
+                                                {'NAME': 'TWO', 'code': 2, 'description': 'one'}])
+        with pytest.raises(
+            ValueError,
+            match=r'Attribute value "ONE" of Member TWO is ambiguous with another member\'s name.',
+        ):
+            MatrixEnum.from_records('BadEnum', [{'NAME': 'ONE', 'code': 1}, {'NAME': 'TWO', 'code': 'ONE'}])
+        with pytest.raises(
+            ValueError,
+            match=r"Member TWO has different addressable keys from other Members: "
+                  r"got \[u?'bar'\], expected \[u?'foo'\].",
+        ):
+            MatrixEnum.from_records('BadEnum', [{'NAME': 'ONE', 'foo': 1}, {'NAME': 'TWO', 'bar': 2}])
+        with pytest.raises(ValueError, match=r"Key _value_ is not allowed."):
+            MatrixEnum.from_records('BadEnum', [{'NAME': 'ONE', '_value_': 1}])
+
+    def test_functional_api(self):
+        MyEnum = MatrixEnum('MyEnum', [('ONE', Member(code=1)), ('TWO', Member(code=2))])
+        assert MyEnum(1) is MyEnum.ONE
+        assert MyEnum.TWO.code == 2
+
+        with pytest.raises(ValueError, match=r"1 is not a Member"):
+            MatrixEnum('BadEnum', 'ONE TWO')
+
+
+class TestFromFiles(TestCase):
+    csv = 'NAME,code,title,paws\nCAT,1,cat,4\nDOG,2,dog,4\n\nFISH,3,fish,0\n'
+    jsonl = (
+        '{"NAME": "CAT", "code": 1, "title": "cat", "paws": 4}\n'
+        '{"NAME": "DOG", "code": 2, "title": "dog", "paws": 4}\n'
+        '\n'
+        '{"NAME": "FISH", "code": 3, "title": "fish", "paws": 0}\n'
+    )
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, filename, contents):
+        path = os.path.join(self.directory, filename)
+        with io.open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(contents)
+        return path
+
+    def assert_animals(self, Animals):
+        assert [member.name for member in Animals] == ['CAT', 'DOG', 'FISH']
+        assert Animals(1) is Animals('cat') is Animals.CAT
+        assert Animals.FISH.paws == 0
+        assert Animals.get(4) is None
+        assert Animals.__module__ == __name__
+
+    def test_from_csv(self):
+        path = self.write('animals.csv', self.csv)
+        self.assert_animals(MatrixEnum.from_csv('Animals', path, extra=['paws'], converters={'code': int, 'paws': int}))
+
+        # Only the listed columns are used.
+        Animals = MatrixEnum.from_csv('Animals', path, addressable=['title'])
+        assert Animals('cat') is Animals.CAT
+        assert not hasattr(Animals.CAT, 'code')
+
+    def test_from_jsonl(self):
+        path = self.write('animals.jsonl', self.jsonl)
+        self.assert_animals(MatrixEnum.from_jsonl('Animals', path, extra=['paws']))
+        Animals = MatrixEnum.from_jsonl('Animals', io.StringIO(self.jsonl), addressable=['code'], extra=['title'])
+        assert Animals.DOG.title == 'dog'
+
+    def test_encoding(self):
+        path = self.write('titles.csv', 'NAME,code,title\nCAFE,1,caf\xe9\n')
+        Cafes = MatrixEnum.from_csv('Cafes', path, converters={'code': int})
+        assert Cafes(1).title == 'caf\xe9'
+        assert Cafes('caf\xe9') is Cafes.CAFE
+
+        with io.open(path, 'w', encoding='latin-1') as f:
+            f.write('{"NAME": "CAFE", "code": 1, "title": "caf\xe9"}\n')
+        assert MatrixEnum.from_jsonl('Cafes', path, encoding='latin-1')(1).title == 'caf\xe9'
+
+    def test_line_numbers(self):
+        ambiguous = self.csv + 'CATFISH,4,fish,0\n'
+        with pytest.raises(
+            ValueError,
+            match=r'ambiguous.csv, line 6: Attribute value "fish" of Member CATFISH is ambiguous with an attribute of '
+                  r'Member FISH.',
+        ):
+            MatrixEnum.from_csv('Animals', self.write('ambiguous.csv', ambiguous), extra=['paws'])
+        with pytest.raises(ValueError, match=r"line 2: Value '4' duplicated within Member specification."):
+            MatrixEnum.from_csv('Animals', self.write('duplicated.csv', 'NAME,code,title\nFOUR,4,4\n'))
+        with pytest.raises(ValueError, match=r"line 3: invalid literal for int"):
+            MatrixEnum.from_csv('Animals', io.StringIO('NAME,code\nONE,1\nTWO,two\n'), converters={'code': int})
+        with pytest.raises(ValueError, match=r"line 4: Missing column u?'paws'."):
+            MatrixEnum.from_jsonl('Animals', io.StringIO(self.jsonl.replace(', "paws": 0', '')), extra=['paws'])
+        with pytest.raises(ValueError, match=r"^line 2: (Expecting|No JSON object)"):
+            MatrixEnum.from_jsonl('Animals', io.StringIO('{"NAME": "ONE", "code": 1}\n{"NAME": \n'))
+
+        # Malformed rows are reported like invalid ones.
+        with pytest.raises(ValueError, match=r"^line 3: Row has more fields than the header.$"):
+            MatrixEnum.from_csv('Animals', io.StringIO('NAME,code\nONE,1\nTWO,2,two\n'))
+        with pytest.raises(ValueError, match=r"^line 3: Row has fewer fields than the header.$"):
+            MatrixEnum.from_csv('Animals', io.StringIO('NAME,code,title\nONE,1,one\nTWO,2\n'), converters={'code': int})
+        with pytest.raises(ValueError, match=r"^line 2: Expected a JSON object, got list.$"):
+            MatrixEnum.from_jsonl('Animals', io.StringIO('{"NAME": "ONE", "code": 1}\n["TWO", 2]\n'))
+        with pytest.raises(ValueError, match=r"^line 1: Invalid row: unhashable type"):
+            MatrixEnum.from_jsonl('Animals', io.StringIO('{"NAME": "ONE", "code": [1]}\n'))
+
+        # Errors that aren't about a single row have no line number.
+        with pytest.raises(ValueError, match=r"^Key _value_ is not allowed.$"):
+            MatrixEnum.from_csv('Animals', io.StringIO('NAME,_value_\nONE,1\n'))
+
+
+class TestLazyEnums(TestCase):
+    def define(self, name, base=MatrixEnum, **members):
+        metacls = type(base)
+        classdict = metacls.__prepare__(name, (base,), lazy=True)
+        for key, member in sorted(members.items()):
+            classdict[key] = member
+        return metacls(str(name), (base,), classdict, lazy=True)
+
+    def test_deferred_until_first_use(self):
+        uses = [
+            lambda MyEnum: MyEnum(1) is MyEnum.ONE,
+            lambda MyEnum: MyEnum('ONE') is MyEnum.ONE,
+            lambda MyEnum: 'two' in MyEnum,
+            lambda MyEnum: MyEnum.get(2) is MyEnum.TWO,
+            lambda MyEnum: MyEnum.ONE.description == 'one',
+            lambda MyEnum: MyEnum['TWO'].foo == 'baz',
+            lambda MyEnum: [member.code for member in MyEnum] == [1, 2],
+            lambda MyEnum: MyEnum.lookup_many([1, 2]) == [MyEnum.ONE, MyEnum.TWO],
+            lambda MyEnum: MyEnum.contains_many([1, 3]) == [True, False],
+            lambda MyEnum: MyEnum.translate([1], 'code', 'foo') == ['bar'],
+            lambda MyEnum: MyEnum.ONE._reversed()['two'] == MyEnum.TWO.value,
+        ]
+        for use in uses:
+            MyEnum = self.define(
+                'MyEnum',
+                ONE=Member(code=1, description='one').extra(foo='bar'),
+                TWO=Member(code=2, description='two').extra(foo='baz'),
+            )
+            assert MyEnum._pending is not None
+            assert 'code' not in vars(MyEnum.ONE)
+            assert use(MyEnum)
+            assert MyEnum._pending is None
+            assert vars(MyEnum.ONE)['code'] == 1
+
+    def test_misses(self):
+        MyEnum = self.define('MyEnum', ONE=Member(code=1))
+        assert 3 not in MyEnum
+        assert MyEnum._pending is None
+        assert 3 not in MyEnum
+
+        MyEnum = self.define('MyEnum', ONE=Member(code=1))
+        assert MyEnum.get(3, 'default') == 'default'
+        assert MyEnum.get(3) is None
+        with pytest.raises(ValueError):
+            MyEnum(3)
+        with pytest.raises(AttributeError, match=r"'MyEnum' object has no attribute 'missing'"):
+            MyEnum.ONE.missing
+
+        MyEnum = self.define('MyEnum', ONE=Member(code=1))
+        with pytest.raises(AttributeError):
+            MyEnum.ONE.missing
+        with pytest.raises(AttributeError, match=r"can't set attribute u?'code'"):
+            self.define('MyEnum', ONE=Member(code=1)).ONE.code = 2
+
+    def test_errors_deferred(self):
+        MyEnum = self.define('MyEnum', ONE=Member(code=1), TWO=Member(code=1))
+        with pytest.raises(ValueError, match=r'Attribute value "1" of Member TWO is ambiguous'):
+            MyEnum(1)
+        # Still invalid on later uses.
+        with pytest.raises(ValueError, match=r'Attribute value "1" of Member TWO is ambiguous'):
+            MyEnum.ONE.code
+
+    def test_aliases_finalize(self):
+        # Enum makes equal Members aliases of the first one, which finalizing reports as ambiguous.
+        uses = [
+            lambda Bad: Bad['A'],
+            lambda Bad: len(Bad),
+            lambda Bad: list(reversed(Bad)),
+            lambda Bad: Bad.__members__,
+        ]
+        for use in uses:
+            Bad = self.define('Bad', A=Member(code=1), B=Member(code=1))
+            with pytest.raises(ValueError, match=r'Attribute value "1" of Member B is ambiguous'):
+                use(Bad)
+
+        MyEnum = self.define('MyEnum', ONE=Member(code=1), TWO=Member(code=2))
+        assert len(MyEnum) == 2
+        # Only lazily-defined enums pay for these checks.
+        assert type(MyEnum) is matrix_enum._LazyMatrixEnumMeta
+        assert type(_make_enum(2)) is type(MatrixEnum)
+        assert list(reversed(MyEnum)) == [MyEnum.TWO, MyEnum.ONE]
+        assert list(MyEnum.__members__) == ['ONE', 'TWO']
+
+    def test_validate_all(self):
+        Base = self.define('Base')
+        Good = self.define('Good', base=Base, ONE=Member(code=1))
+        Base.validate_all()
+        assert Good._pending is None
+
+        Bad = self.define('Bad', base=Base, ONE=Member(code=1), TWO=Member(other=2))
+        with pytest.raises(ValueError, match=r'Member TWO has different addressable keys'):
+            Base.validate_all()
+        assert Bad._pending is not None
+
+    def test_environment_default(self):
+        with mock.patch.object(matrix_enum, '_lazy_default', True):
+            class MyEnum(MatrixEnum):
+                ONE = Member(code=1)
+        assert MyEnum._pending is not None
+        assert MyEnum(1) is MyEnum.ONE
+
+
+class PickledEnum(MatrixEnum):
+    ONE = Member(code=1, description='one').extra(foo='bar')
+    TWO = Member(code=2, description='two').extra(foo='baz')
+
+
+class TestPickling(TestCase):
+    def test_pickle_by_name(self):
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            for member in PickledEnum:
+                data = pickle.dumps(member, protocol)
+                assert pickle.loads(data) is member
+                # No Member in the payload, just the class and member name.
+                assert b'Member' not in data
+                assert b'description' not in data
+            assert pickle.loads(pickle.dumps(list(PickledEnum) * 3, protocol)) == list(PickledEnum) * 3
+
+    def test_pack_members(self):
+        members = [PickledEnum.TWO, PickledEnum.ONE, PickledEnum.TWO]
+        data = PickledEnum.pack_members(members)
+        assert data == b'\x01\x00\x01'
+        assert PickledEnum.unpack_members(data) == members
+        assert PickledEnum.pack_members(iter([])) == b''
+        assert PickledEnum.unpack_members(b'') == []
+
+        with pytest.raises(ValueError, match=r"1 is not a member of PickledEnum."):
+            PickledEnum.pack_members([PickledEnum.ONE, 1])
+        with pytest.raises(ValueError, match=r"Packed members are not PickledEnum members."):
+            PickledEnum.unpack_members(b'\x02')
+
+    def test_pack_large_enums(self):
+        LargeEnum = _make_enum(300)
+        members = [LargeEnum.M299, LargeEnum.M0, LargeEnum.M256]
+        data = LargeEnum.pack_members(members)
+        assert len(data) == 6
+        assert LargeEnum.unpack_members(data) == members
+        with pytest.raises(ValueError, match=r"Packed GeneratedEnum members have an invalid length."):
+            LargeEnum.unpack_members(data[:-1])
+
+
+class TestStats(TestCase):
+    def test_disabled(self):
+        MyEnum = _make_enum(3)
+        assert MyEnum.stats() is None
+        assert type(MyEnum._lookup) is dict
+
+    def test_counts(self):
+        MyEnum = _make_enum(3)
+        MyEnum.enable_stats()
+        assert MyEnum(1) is MyEnum.M1
+        assert 'label 2' in MyEnum
+        assert MyEnum.get('M0') is MyEnum.M0
+        assert 7 not in MyEnum
+        assert MyEnum.get([]) is None
+        with pytest.raises(ValueError):
+            MyEnum(7)
+        # Bulk lookups probe each item once, even after an unhashable one or a miss that raises.
+        MyEnum.lookup_many([0, [1], 8], on_missing='none')
+        MyEnum.contains_many([[0], 0])
+        with pytest.raises(ValueError):
+            MyEnum.lookup_many([1, 9])
+
+        stats = MyEnum.stats()
+        assert stats == {
+            'lookups': 13, 'hits': 6, 'misses': 7, 'top_misses': [(7, 2), (8, 1), (9, 1)], 'seconds': None,
+        }
+        assert MyEnum.stats(reset=True) == stats
+        assert MyEnum.stats()['lookups'] == 0
+
+        MyEnum.disable_stats()
+        assert MyEnum(1) is MyEnum.M1
+        assert MyEnum.stats() is None
+        assert type(MyEnum._lookup) is dict
+
+    def test_top_misses_bounded(self):
+        MyEnum = _make_enum(3)
+        MyEnum.enable_stats(top_misses=2)
+        for value in [10, 10, 10, 11, 12, 12, 12, 12]:
+            assert value not in MyEnum
+        # 11 was replaced by 12, which inherited its count.
+        assert MyEnum.stats()['top_misses'] == [(12, 5), (10, 3)]
+
+        MyEnum.enable_stats(top_misses=0)
+        assert 10 not in MyEnum
+        assert MyEnum.stats()['top_misses'] == []
+        assert MyEnum.stats()['misses'] == 1
+
+    def test_timing_and_callback(self):
+        MyEnum = _make_enum(3)
+        calls = []
+        MyEnum.enable_stats(timing=True, callback=lambda *args: calls.append(args))
+        MyEnum(0)
+        assert 5 not in MyEnum
+        assert [call[:3] for call in calls] == [(MyEnum, 0, True), (MyEnum, 5, False)]
+        assert all(seconds >= 0 for _, _, _, seconds in calls)
+        assert MyEnum.stats()['seconds'] >= 0
+
+        MyEnum.enable_stats(callback=lambda *args: calls.append(args))
+        MyEnum(0)
+        assert calls[-1] == (MyEnum, 0, True, None)
+
+    def test_subclasses(self):
+        MyEnum = _make_enum(3)
+        MatrixEnum.enable_stats()
+        try:
+            LaterEnum = _make_enum(3, name='LaterEnum')
+            metacls = type(MatrixEnum)
+            classdict = metacls.__prepare__('LazyEnum', (MatrixEnum,), lazy=True)
+            classdict['ONE'] = Member(code=1)
+            LazyEnum = metacls(str('LazyEnum'), (MatrixEnum,), classdict, lazy=True)
+
+            for enum_class in (MyEnum, LaterEnum, LazyEnum):
+                assert 1 in enum_class
+                assert enum_class.stats()['hits'] == 1
+            assert MatrixEnum.stats() is None
+        finally:
+            MatrixEnum.disable_stats()
+        assert MyEnum.stats() is None
+        assert LazyEnum.stats() is None
+        assert _make_enum(3).stats() is None
+
+
+class TestFromCode(TestCase):
+    def test_dense_codes(self):
+        MyEnum = _make_enum(5)
+        assert MyEnum._code_key == 'code'
+        assert MyEnum._codes[0] == 0
+        assert isinstance(MyEnum._codes[1], tuple)
+        assert [MyEnum.from_code(code) for code in range(5)] == list(MyEnum)
+        for code in (-1, 5, 2.5, 'label 1', None, []):
+            with pytest.raises(ValueError, match=r"is not a valid GeneratedEnum code"):
+                MyEnum.from_code(code)
+
+    def test_gaps(self):
+        class MyEnum(MatrixEnum):
+            ONE = Member(code=1, digit=10)
+            TWO = Member(code=2, digit=20)
+            FOUR = Member(code=4, digit=40)
+
+        assert MyEnum._codes[0] == 1
+        assert MyEnum.from_code(4) is MyEnum.FOUR
+        with pytest.raises(ValueError, match=r"3 is not a valid MyEnum code"):
+            MyEnum.from_code(3)
+
+    def test_sparse_codes(self):
+        class MyEnum(MatrixEnum):
+            ONE = Member(number=1, description='one')
+            BIG = Member(number=10 ** 6, description='big')
+
+        assert MyEnum._code_key == 'number'
+        assert isinstance(MyEnum._codes[1], dict)
+        assert MyEnum.from_code(10 ** 6) is MyEnum.BIG
+        for code in (0, 2, 2.5, 'one', []):
+            with pytest.raises(ValueError, match=r"is not a valid MyEnum number"):
+                MyEnum.from_code(code)
+
+    def test_no_code(self):
+        class Ambiguous(MatrixEnum):
+            ONE = Member(left=1, right=-1)
+
+        class Textual(MatrixEnum):
+            ONE = Member(code='one', flag=True)
+
+        for enum_class in (Ambiguous, Textual):
+            assert enum_class._code_key is None
+            with pytest.raises(ValueError, match=r"{} has no integer code attribute.".format(enum_class.__name__)):
+                enum_class.from_code(1)
+
+    def test_lazy(self):
+        metacls = type(MatrixEnum)
+        classdict = metacls.__prepare__('LazyEnum', (MatrixEnum,), lazy=True)
+        classdict['ONE'] = Member(code=1)
+        LazyEnum = metacls(str('LazyEnum'), (MatrixEnum,), classdict, lazy=True)
+        assert LazyEnum.from_code(1) is LazyEnum.ONE
+
+    def test_own_from_code(self):
+        class MyEnum(MatrixEnum):
+            ONE = Member(code=1)
+
+            @classmethod
+            def from_code(cls, code):
+                return cls(code - 1)
+
+        assert MyEnum.from_code(2) is MyEnum.ONE
+
+
+class TestScopedLookups(TestCase):
+    def test_by(self):
+        class MyEnum(MatrixEnum):
+            ONE = Member(code=1, title='one')
+            TWO = Member(code=2, title='two')
+
+        assert MyEnum.by('code', 1) is MyEnum.ONE
+        assert MyEnum.by('title', 'two') is MyEnum.TWO
+        assert MyEnum.by('name', 'TWO') is MyEnum.TWO
+        assert MyEnum.by_code(2) is MyEnum.TWO
+        assert MyEnum.by_title('one') is MyEnum.ONE
+        assert MyEnum.by_code.__name__ == 'by_code'
+
+        with pytest.raises(ValueError, match=r"u?'one' is not a valid MyEnum code"):
+            MyEnum.by('code', 'one')
+        with pytest.raises(ValueError, match=r"\[\] is not a valid MyEnum title"):
+            MyEnum.by_title([])
+        with pytest.raises(ValueError, match=r"1 is not a valid MyEnum title"):
+            MyEnum.by_title(1)
+        with pytest.raises(ValueError, match=r"Can't look up by foo: not an addressable key of MyEnum."):
+            MyEnum.by('foo', 1)
+        with pytest.raises(AttributeError, match=r"by_foo"):
+            MyEnum.by_foo
+
+    def test_scoped_enum(self):
+        MyEnum = _define_enum('MyEnum', [
+            ('ONE', Member(code=1, rank=2, title='TWO')),
+            ('TWO', Member(code=2, rank=1, title='one')),
+            ('THREE', Member(code=3, rank=4, title=2)),
+        ], scoped=True)
+
+        assert MyEnum.by_code(1) is MyEnum.ONE
+        assert MyEnum.by_rank(1) is MyEnum.TWO
+        assert MyEnum.by_title('TWO') is MyEnum.ONE
+        assert MyEnum.by_title(2) is MyEnum.THREE
+        assert MyEnum.by('name', 'TWO') is MyEnum.TWO
+        # Values that aren't shared across attributes still resolve directly; 3 belongs to THREE alone.
+        assert MyEnum(3) is MyEnum.THREE
+        assert MyEnum('one') is MyEnum.TWO
+        for value in (1, 2, 'TWO'):
+            assert value not in MyEnum
+            assert MyEnum.get(value) is None
+            with pytest.raises(ValueError, match=r"u?'?{}'? is ambiguous in MyEnum: look it up with by\(\).".format(
+                value,
+            )) as info:
+                MyEnum(value)
+            assert getattr(info.value, '__context__', None) is None
+        with pytest.raises(ValueError):
+            MyEnum([])
+
+    def test_scoped_collisions(self):
+        with pytest.raises(
+            ValueError,
+            match=r'Attribute code value "1" of Member TWO is ambiguous with Member ONE.',
+        ):
+            _define_enum(
+                'BadEnum', [('ONE', Member(code=1, title='one')), ('TWO', Member(code=1, title='two'))], scoped=True,
+            )
+
+        with pytest.raises(ValueError, match=r'line 3: Attribute title value "one" of Member TWO is ambiguous'):
+            MatrixEnum.from_csv('BadEnum', io.StringIO(u'NAME,code,title\nONE,1,one\nTWO,2,one\n'), scoped=True)
+        with pytest.raises(ValueError, match=r'^line 3: Attribute value "A" of Member A is ambiguous with another'):
+            MatrixEnum.from_csv('BadEnum', io.StringIO(u'NAME,code,title\nA,1,one\nA,2,two\n'), scoped=True)
+
+    def test_scoped_from_records(self):
+        rows = [{'NAME': 'ONE', 'code': 1, 'rank': 2}, {'NAME': 'TWO', 'code': 2, 'rank': 1}]
+        with pytest.raises(ValueError, match=r'is ambiguous with an attribute of Member ONE'):
+            MatrixEnum.from_records('MyEnum', rows)
+        MyEnum = MatrixEnum.from_records('MyEnum', rows, scoped=True)
+        assert MyEnum.by_rank(2) is MyEnum.ONE
+        assert MyEnum.by_code(2) is MyEnum.TWO
+
+    def test_accessor_clash(self):
+        with pytest.raises(ValueError, match=r"Key code is not allowed."):
+            class BadEnum(MatrixEnum):
+                ONE = Member(code=1)
+
+                def by_code(self):
+                    pass
+
+    def define_lazy(self):
+        metacls = type(MatrixEnum)
+        classdict = metacls.__prepare__('LazyEnum', (MatrixEnum,), lazy=True, scoped=True)
+        classdict['ONE'] = Member(code=1, rank=2)
+        classdict['TWO'] = Member(code=2, rank=1)
+        return metacls(str('LazyEnum'), (MatrixEnum,), classdict, lazy=True, scoped=True)
+
+    def test_lazy(self):
+        LazyEnum = self.define_lazy()
+        pending = LazyEnum.by_rank
+        assert pending.__name__ == 'by_rank'
+        assert pending(1) is LazyEnum.TWO
+        assert LazyEnum.by_rank is not pending
+        assert pending(2) is LazyEnum.ONE
+
+        LazyEnum = self.define_lazy()
+        assert LazyEnum.by('code', 1) is LazyEnum.ONE
+
+        LazyEnum = self.define_lazy()
+        with pytest.raises(AttributeError):
+            LazyEnum.__foo__
+        assert LazyEnum._pending is not None
+        with pytest.raises(ValueError, match=r"1 is ambiguous in LazyEnum"):
+            LazyEnum(1)
+
+
+class TestWhere(TestCase):
+    def setUp(self):
+        class Animals(MatrixEnum):
+            CAT = Member(code=1).extra(num_paws=4, habitat='land')
+            BIRD = Member(code=2).extra(num_paws=2, habitat='air')
+            DOG = Member(code=3).extra(num_paws=4, habitat='land')
+            SEAL = Member(code=4).extra(num_paws=4, habitat='sea')
+
+        self.Animals = Animals
+
+    def test_single_key(self):
+        Animals = self.Animals
+        assert Animals.where(num_paws=4) == (Animals.CAT, Animals.DOG, Animals.SEAL)
+        assert Animals.where(num_paws=4) is Animals.where(num_paws=4)
+        assert Animals.where(habitat='air') == (Animals.BIRD,)
+        assert Animals.where(code=3) == (Animals.DOG,)
+        assert Animals.where(num_paws=3) == ()
+        assert Animals.where(habitat=[]) == ()
+
+    def test_multiple_keys(self):
+        Animals = self.Animals
+        assert Animals.where(num_paws=4, habitat='land') == (Animals.CAT, Animals.DOG)
+        assert Animals.where(habitat='sea', num_paws=4) == (Animals.SEAL,)
+        assert Animals.where(habitat='sea', num_paws=2) == ()
+        assert Animals.where() == tuple(Animals)
+
+    def test_invalid_key(self):
+        with pytest.raises(ValueError, match=r"Can't filter by legs: not an attribute of Animals."):
+            self.Animals.where(legs=4)
+
+
+class TestMemberSet(TestCase):
+    def setUp(self):
+        self.Channels = _define_enum('Channels', [
+            ('EMAIL', Member(code=1, title='email')),
+            ('SMS', Member(code=2, title='sms')),
+            ('PUSH', Member(code=3, title='push')),
+            ('POST', Member(code=4, title='post')),
+        ])
+
+    def test_construction(self):
+        Channels = self.Channels
+        channels = MemberSet(Channels, [Channels.PUSH, 'email', 2, 'EMAIL'])
+        assert list(channels) == [Channels.EMAIL, Channels.SMS, Channels.PUSH]
+        assert len(channels) == 3
+        assert int(channels) == 0b0111
+        assert channels.enum_class is Channels
+        assert MemberSet.from_mask(Channels, 0b0111) == channels
+        assert not MemberSet(Channels)
+        assert channels
+        assert repr(MemberSet(Channels, ['sms'])) == 'MemberSet(Channels, [{!r}])'.format(Channels.SMS)
+
+        with pytest.raises(ValueError, match=r"(u?')?fax'? is not a valid .*Channels"):
+            MemberSet(Channels, ['fax'])
+        for mask in (-1, 1 << 4, 1.0):
+            with pytest.raises(ValueError, match=r"is not a valid Channels member mask."):
+                MemberSet.from_mask(Channels, mask)
+
+    def test_operators(self):
+        Channels = self.Channels
+        left = MemberSet(Channels, ['email', 'sms'])
+        right = MemberSet(Channels, ['sms', 'push'])
+        assert left | right == MemberSet(Channels, ['email', 'sms', 'push'])
+        assert left & right == MemberSet(Channels, ['sms'])
+        assert left - right == MemberSet(Channels, ['email'])
+        assert left ^ right == MemberSet(Channels, ['email', 'push'])
+        assert left != right
+        assert not left == right
+
+        both = left | right
+        assert left <= both and left < both and both >= left and both > left
+        assert left <= left and not left < left and left >= left and not left > left
+        assert not left <= right and not left >= right
+        assert hash(left) == hash(MemberSet(Channels, ['sms', 'email']))
+
+    def test_other_types(self):
+        Channels = self.Channels
+        channels = MemberSet(Channels, ['email'])
+        other = MemberSet(_make_enum(3), ['M0'])
+        assert channels != other
+        assert channels != {Channels.EMAIL}
+        for operation in (lambda: channels | other, lambda: channels & {Channels.EMAIL}, lambda: channels <= other):
+            with pytest.raises(TypeError):
+                operation()
+
+    def test_contains(self):
+        Channels = self.Channels
+        channels = MemberSet(Channels, ['email', 'push'])
+        assert Channels.EMAIL in channels
+        assert 'push' in channels
+        assert 3 in channels
+        assert Channels.SMS not in channels
+        assert 'fax' not in channels
+        assert [] not in channels
+
+    def test_definition_order(self):
+        Shuffled = MatrixEnum.from_records('Shuffled', [
+            {'NAME': 'C', 'code': 1}, {'NAME': 'A', 'code': 2}, {'NAME': 'B', 'code': 3},
+        ])
+        assert list(Shuffled._by_ordinal) == [Shuffled.C, Shuffled.A, Shuffled.B]
+        assert list(MemberSet(Shuffled, ['B', 'C'])) == [Shuffled.C, Shuffled.B]
+        assert int(MemberSet(Shuffled, [Shuffled.C])) == 0b001
+        assert int(MemberSet(Shuffled, [Shuffled.B])) == 0b100
+        assert list(self.Channels._by_ordinal) == list(self.Channels)
+        assert int(MemberSet(self.Channels, [self.Channels.POST])) == 0b1000
+
+    def test_large_enum(self):
+        LargeEnum = _make_enum(300)
+        members = [LargeEnum.M299, LargeEnum.M0, LargeEnum.M64]
+        member_set = MemberSet(LargeEnum, members)
+        assert list(member_set) == [LargeEnum.M0, LargeEnum.M64, LargeEnum.M299]
+        assert int(member_set) == 1 | 1 << 64 | 1 << 299
+
+    def test_pickle(self):
+        member_set = MemberSet(PickledEnum, ['two'])
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            assert pickle.loads(pickle.dumps(member_set, protocol)) == member_set
+
+
+def _normalize(value):
+    return value.strip().lower()
+
+
+class TestNormalizedLookups(TestCase):
+    def setUp(self):
+        self.Regions = _define_enum('Regions', [
+            ('EU', Member(code=1, title='Europe')),
+            ('US', Member(code=2, title='United States')),
+        ], normalize=_normalize)
+
+    def test_lookups(self):
+        Regions = self.Regions
+        for value in ('EU', 'eu', ' Eu ', 'europe', 'EUROPE '):
+            assert Regions(value) is Regions.EU
+            assert value in Regions
+            assert Regions.get(value) is Regions.EU
+        assert Regions(1) is Regions.EU
+        assert Regions.lookup_many(['united states', 'US', 'fr'], on_missing='none') == [Regions.US, Regions.US, None]
+        assert Regions.lookup_many(['united states']) == [Regions.US]
+        assert Regions.contains_many(['united states', 'fr', 3]) == [True, False, False]
+        assert 'fr' not in Regions
+        assert Regions.get('fr', 0) == 0
+        with pytest.raises(ValueError, match=r"(u?')? fr'? is not a valid .*Regions"):
+            Regions(' fr')
+
+    def test_stats(self):
+        Regions = self.Regions
+        Regions.enable_stats()
+        assert Regions(' EU ') is Regions.EU
+        assert Regions.get('fr') is None
+        assert 'europe' in Regions
+        assert Regions.lookup_many(['us ', 'fr'], on_missing='none') == [Regions.US, None]
+        assert Regions.contains_many(['US', 'de']) == [True, False]
+        assert Regions.stats() == {
+            'lookups': 7, 'hits': 4, 'misses': 3, 'top_misses': [('fr', 2), ('de', 1)], 'seconds': None,
+        }
+
+    def test_normalizes_once(self):
+        normalize = mock.Mock(side_effect=_normalize)
+        Regions = _define_enum('Regions', [
+            ('EU', Member(code=1, title='Europe')),
+            ('US', Member(code=2, title='United States')),
+        ], normalize=normalize)
+        # The title and name of each member.
+        assert normalize.call_count == 4
+        assert Regions('europe') is Regions.EU
+        assert normalize.call_count == 5
+
+    def test_collisions(self):
+        with pytest.raises(
+            ValueError,
+            match=r'Attribute value "europe" of Member EUROPE is ambiguous with an attribute of Member EU when '
+                  r'normalized.',
+        ):
+            _define_enum('BadEnum', [
+                ('EU', Member(code=1, title='Europe')),
+                ('EUROPE', Member(code=2, title='europe')),
+            ], normalize=_normalize)
+
+        with pytest.raises(
+            ValueError,
+            match=r'Attribute value "eu" of Member EUROPE is ambiguous with another member\'s name when normalized.',
+        ):
+            _define_enum('BadEnum1', [
+                ('EU', Member(code=1, title='Europe')),
+                ('EUROPE', Member(code=2, title='eu')),
+            ], normalize=_normalize)
+
+        # Values that collide as they are get the usual error.
+        with pytest.raises(
+            ValueError,
+            match=r'^Attribute value "EU" of Member B is ambiguous with an attribute of Member A\.$',
+        ):
+            _define_enum('BadEnum2', [('A', Member(code='EU')), ('B', Member(code='EU'))], normalize=_normalize)
+
+        # Values of a single member may normalize to the same key.
+        GoodEnum = _define_enum('GoodEnum', [('EU', Member(code=1, title='eu', short='EU '))], normalize=_normalize)
+        assert GoodEnum('Eu') is GoodEnum.EU
+
+    def test_scoped(self):
+        Regions = _define_enum('Regions', [
+            ('EU', Member(code='eu', title='Europe')),
+            ('EUROPE', Member(code='europe', title='EU')),
+            ('US', Member(code='us', title='United States')),
+        ], normalize=_normalize, scoped=True)
+        assert Regions('eu') is Regions.EU
+        assert Regions.by_code('eu') is Regions.EU
+        assert Regions('US ') is Regions.US
+        # Different members' values normalize to 'eu' and 'europe', so they are only found as exact values.
+        assert 'Eu' not in Regions
+        assert 'europe ' not in Regions
+
+    def test_from_records(self):
+        rows = [{'NAME': 'EU', 'code': 1}, {'NAME': 'US', 'code': 2}]
+        Regions = MatrixEnum.from_records('Regions', rows, normalize=_normalize)
+        assert Regions('us ') is Regions.US
+
+        data = u'NAME,code\nEU,1\neu,2\n'
+        with pytest.raises(ValueError, match=r'line 3: Attribute value "eu" of Member eu is ambiguous'):
+            MatrixEnum.from_csv('Regions', io.StringIO(data), normalize=_normalize)
+
+
+class TestCodecs(TestCase):
+    def test_codec(self):
+        codec = PickledEnum.codec('code')
+        assert PickledEnum.codec('code') is codec
+        assert codec.encode(PickledEnum.TWO) == 2
+        assert codec.decode(1) is PickledEnum.ONE
+        assert codec.encode_many(iter([PickledEnum.TWO, PickledEnum.ONE])) == [2, 1]
+        assert codec.decode_many(iter([1, 2, 1])) == [PickledEnum.ONE, PickledEnum.TWO, PickledEnum.ONE]
+        assert PickledEnum.codec('name').encode_many([PickledEnum.ONE]) == ['ONE']
+
+        with pytest.raises(ValueError, match=r"u?'one' is not a valid PickledEnum code"):
+            codec.decode('one')
+        with pytest.raises(ValueError, match=r"\[\] is not a valid PickledEnum code"):
+            codec.decode_many([1, []])
+        with pytest.raises(ValueError, match=r"1 is not a member of PickledEnum."):
+            codec.encode(1)
+        with pytest.raises(ValueError, match=r"1 is not a member of PickledEnum."):
+            codec.encode_many(iter([PickledEnum.ONE, 1]))
+        with pytest.raises(ValueError, match=r"Can't make a codec for foo: not an addressable key of PickledEnum."):
+            PickledEnum.codec('foo')
+
+    def test_json(self):
+        codec = PickledEnum.codec('description')
+        payload = {'members': [PickledEnum.ONE, PickledEnum.TWO], 'default': PickledEnum.ONE}
+        data = json.dumps(payload, default=codec.default, sort_keys=True)
+        assert data == '{"default": "one", "members": ["one", "two"]}'
+        assert codec.decode_many(json.loads(data)['members']) == [PickledEnum.ONE, PickledEnum.TWO]
+
+        with pytest.raises(TypeError, match=r"Object of type set is not JSON serializable"):
+            json.dumps([set()], default=codec.default)
+        with pytest.raises(TypeError, match=r"Object of type GeneratedEnum is not JSON serializable"):
+            json.dumps([_make_enum(1).M0], default=codec.default)
+
+
+class TestConcurrency(TestCase):
+    def run_threads(self, target, count=8):
+        start = threading.Event()
+        errors = []
+
+        def run():
+            start.wait()
+            try:
+                target()
+            except Exception as error:  # pragma: no cover
+                errors.append(error)
+
+        threads = [threading.Thread(target=run) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        # Switch threads as often as possible (on Python 3), to interleave first uses of lazy enums.
+        interval = sys.getswitchinterval() if hasattr(sys, 'getswitchinterval') else None
+        if interval is not None:
+            sys.setswitchinterval(1e-6)
+        try:
+            start.set()
+            for thread in threads:
+                thread.join()
+        finally:
+            if interval is not None:
+                sys.setswitchinterval(interval)
+        assert errors == []
+
+    def check_reads(self, MyEnum):
+        for _ in range(20):
+            for ordinal, member in enumerate(MyEnum._by_ordinal):
+                assert MyEnum(ordinal) is member
+                assert 'label {}'.format(ordinal) in MyEnum
+                assert member.label == 'label {}'.format(ordinal)
+                assert MyEnum.by_code(ordinal) is member
+                assert MyEnum.from_code(ordinal) is member
+            assert -1 not in MyEnum
+            assert MyEnum.translate([0, 1], 'code', 'label') == ['label 0', 'label 1']
+            assert MyEnum.codec('label').decode('label 1') is MyEnum.M1
+
+    def test_concurrent_reads(self):
+        MyEnum = _make_enum(50)
+        self.run_threads(lambda: self.check_reads(MyEnum))
+
+    def test_concurrent_first_use(self):
+        for _ in range(10):
+            LazyEnum = _make_enum(50, 'LazyEnum', lazy=True)
+            self.run_threads(lambda: self.check_reads(LazyEnum))
+
+
 class TestBrokenEnums(TestCase):
     def test_ambiguous_member(self):
         with pytest.raises(
@@ -158,12 +1276,30 @@ class TestBrokenEnums(TestCase):
                 ONE = Member(code=1, description='foo', plain_text="plaintext")
                 TWO = Member(code=2, description='ONE', plain_text="something else plain")
 
+    def test_name_keying_later_member(self):
+        # Attributes matching a member name defined later are just as ambiguous.
+        with pytest.raises(
+            ValueError,
+            match=r'Attribute value "TWO" of Member ONE is ambiguous with another member\'s name.',
+        ):
+            class BadEnum(MatrixEnum):
+                ONE = Member(code=1, description='TWO')
+                TWO = Member(code=2, description='two')
+
     def test_invalid_enums(self):
         with pytest.raises(ValueError, match=r"Key code is not allowed."):
             class BadEnum(MatrixEnum):
                 ONE = Member(code=1)
                 code = Member(code=2)
 
+        with pytest.raises(ValueError, match=r"Key _name_ is not allowed."):
+            class BadEnum2(MatrixEnum):
+                ONE = Member(_name_=1)
+
+        with pytest.raises(ValueError, match=r"Key _reversed is not allowed."):
+            class BadEnum3(MatrixEnum):
+                ONE = Member(code=1).extra(_reversed=1)
+
         with pytest.raises(ValueError, match=r"Key _reversed is not allowed."):
             class BadEnum1(MatrixEnum):
                 _reversed = Member(code=1)
@@ -178,6 +1314,10 @@ class TestBrokenMembers(TestCase):
     def test_invalid_attrs(self):
         with pytest.raises(ValueError, match=r"Member attribute 'extra' is not allowed."):
             Member(extra=6)  # 'extra' is a function on Member and cannot be used
+        with pytest.raises(ValueError, match=r"Member attribute '_values' is not allowed."):
+            Member(_values=6)
+        with pytest.raises(ValueError, match=r"Member attribute 'code' is not allowed."):
+            Member(code=1).extra(code=2)
 
 
 class TestExtras(TestCase):